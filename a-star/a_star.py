@@ -1,19 +1,56 @@
 from __future__ import annotations
 
+from abc import ABCMeta, abstractmethod
 from graph import Graph
 from dataclasses import dataclass, field
-from queue import PriorityQueue
+from heapq import heappop, heappush
+from math import inf
+from time import perf_counter
+from typing import Callable, Hashable, Iterable
 
 
 @dataclass(slots=True, order=True)
 class Node:
-    state: str = field(compare=False)
+    state: Hashable = field(compare=False)
     cost: int = field(default=0)
     parent: Node = field(default=None, compare=False)
 
 
+class SearchProblem(metaclass=ABCMeta):
+    initial_node: Node
+
+    @abstractmethod
+    def is_goal(self, state: Hashable) -> bool:
+        pass
+
+    @abstractmethod
+    def successors(self, state: Hashable) -> Iterable[tuple[Hashable, float]]:
+        pass
+
+    @abstractmethod
+    def heuristic(self, state: Hashable) -> float:
+        pass
+
+
 @dataclass(slots=True)
-class Problem:
+class ImplicitProblem(SearchProblem):
+    initial_node: Node
+    goal_state: Hashable
+    successor_function: Callable[[Hashable], Iterable[tuple[Hashable, float]]]
+    heuristic_function: Callable[[Hashable], float] = lambda state: 0
+
+    def is_goal(self, state: Hashable) -> bool:
+        return state == self.goal_state
+
+    def successors(self, state: Hashable) -> Iterable[tuple[Hashable, float]]:
+        return self.successor_function(state)
+
+    def heuristic(self, state: Hashable) -> float:
+        return self.heuristic_function(state)
+
+
+@dataclass(slots=True)
+class Problem(SearchProblem):
     initial_node: Node
     goal_state: str
     graph: Graph[str]
@@ -22,34 +59,97 @@ class Problem:
     def is_goal(self, state: str) -> bool:
         return state == self.goal_state
 
+    def successors(self, state: str) -> Iterable[tuple[str, float]]:
+        graph = self.graph
+        return [(adj_state, graph.edge_cost(state, adj_state)) for adj_state in graph.adj(state)]
 
-counter = 0
-
+    def heuristic(self, state: str) -> float:
+        return self.heuristics[state]
 
-def a_star(problem: Problem) -> Node | None:
-    global counter
-    graph = problem.graph
-    initial_node = problem.initial_node
 
-    def expand(node: Node) -> list[Node]:
-        for adj_state in graph.adj(node.state):
-            cost = node.cost + graph.edge_cost(node.state, adj_state)
-            cost += problem.heuristics[adj_state] - problem.heuristics[node.state]
-            yield Node(state=adj_state, parent=node, cost=cost)
-
-    frontier = PriorityQueue[Node]()
-    frontier.put_nowait(initial_node)
-    reached = {initial_node.state: initial_node}
-    while not frontier.empty():
-        counter += 1
-        node = frontier.get_nowait()
-        if problem.is_goal(node.state):
-            return node
-        for adj in expand(node):
-            adj_state = adj.state
-            if adj_state not in reached or adj.cost < reached[adj_state].cost:
-                reached[adj_state] = adj
-                frontier.put_nowait(adj)
+@dataclass(slots=True)
+class SearchStats:
+    expansions: int = 0
+    pushes: int = 0
+    reopenings: int = 0
+    peak_frontier: int = 0
+    peak_reached: int = 0
+    regenerations: int = 0
+    wall_time: float = 0.0
+
+
+def a_star(problem: SearchProblem) -> Node | None:
+    node, _ = a_star_search(problem)
+    return node
+
+
+def a_star_search(problem: SearchProblem,
+                  on_expand: Callable[[Hashable, float], None] | None = None,
+                  on_push: Callable[[Hashable, float, float], None] | None = None) -> tuple[Node | None, SearchStats]:
+    start_time = perf_counter()
+    successors = problem.successors
+    heuristic = problem.heuristic
+    is_goal = problem.is_goal
+    initial_state = problem.initial_node.state
+
+    g_costs = {initial_state: problem.initial_node.cost - heuristic(initial_state)}
+    parents = {initial_state: None}
+    closed = set()
+    frontier = [(problem.initial_node.cost, 0, initial_state)]
+    tiebreak = 1
+    expansions = reopenings = 0
+    peak_frontier = 1
+    result = None
+    while frontier:
+        _, _, state = heappop(frontier)
+        if state in closed:
+            continue
+        expansions += 1
+        state_cost = g_costs[state]
+        if on_expand is not None:
+            on_expand(state, state_cost)
+        if is_goal(state):
+            result = _reconstruct_path(state, parents, g_costs, heuristic)
+            break
+        closed.add(state)
+        for adj_state, edge_cost in successors(state):
+            adj_cost = state_cost + edge_cost
+            if adj_cost < g_costs.get(adj_state, inf):
+                g_costs[adj_state] = adj_cost
+                parents[adj_state] = state
+                if adj_state in closed:
+                    closed.remove(adj_state)
+                    reopenings += 1
+                adj_priority = adj_cost + heuristic(adj_state)
+                heappush(frontier, (adj_priority, tiebreak, adj_state))
+                tiebreak += 1
+                if on_push is not None:
+                    on_push(adj_state, adj_cost, adj_priority)
+        if len(frontier) > peak_frontier:
+            peak_frontier = len(frontier)
+
+    stats = SearchStats(expansions=expansions,
+                        pushes=tiebreak,
+                        reopenings=reopenings,
+                        peak_frontier=peak_frontier,
+                        peak_reached=len(g_costs),
+                        wall_time=perf_counter() - start_time)
+    return result, stats
+
+
+def _reconstruct_path(state: Hashable,
+                      parents: dict[Hashable, Hashable | None],
+                      g_costs: dict[Hashable, float],
+                      heuristic: Callable[[Hashable], float]) -> Node:
+    path = []
+    while state is not None:
+        path.append(state)
+        state = parents[state]
+
+    node = None
+    for state in reversed(path):
+        node = Node(state=state, cost=g_costs[state] + heuristic(state), parent=node)
+    return node
 
 
 if __name__ == '__main__':
@@ -98,5 +198,6 @@ if __name__ == '__main__':
     initial_node = Node(state='A', cost=heuristics1['A'])
     problem = Problem(initial_node=initial_node, goal_state='G', graph=graph, heuristics=heuristics1)
 
-    print(a_star(problem))
-    print(counter)
+    node, stats = a_star_search(problem)
+    print(node)
+    print(stats)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from heapq import heapify, heappop, heappush
+from math import inf
+from time import perf_counter
+from typing import Hashable, Iterator
+
+from a_star import Node, SearchProblem, SearchStats, _reconstruct_path
+from search_problems import grid_problem
+
+
+@dataclass(slots=True)
+class AnytimeSolution:
+    node: Node
+    weight: float
+    suboptimality: float
+    stats: SearchStats
+
+
+def ara_star(problem: SearchProblem,
+             initial_weight: float = 3.0,
+             weight_step: float = 0.5,
+             time_budget: float | None = None,
+             suboptimality_bound: float = 1.0) -> Iterator[AnytimeSolution]:
+    if weight_step <= 0:
+        raise ValueError("weight_step must be positive!")
+    return _ara_star(problem, initial_weight, weight_step, time_budget, suboptimality_bound)
+
+
+def _ara_star(problem: SearchProblem,
+              initial_weight: float,
+              weight_step: float,
+              time_budget: float | None,
+              suboptimality_bound: float) -> Iterator[AnytimeSolution]:
+    start_time = perf_counter()
+    deadline = inf if time_budget is None else start_time + time_budget
+    successors = problem.successors
+    heuristic = problem.heuristic
+    is_goal = problem.is_goal
+    initial_state = problem.initial_node.state
+
+    g_costs = {initial_state: problem.initial_node.cost - heuristic(initial_state)}
+    parents = {initial_state: None}
+    closed: set[Hashable] = set()
+    inconsistent: set[Hashable] = set()
+    open_keys: dict[Hashable, float] = {}
+    frontier: list[tuple[float, int, Hashable]] = []
+    goal_state = None
+    stats = SearchStats()
+    tiebreak = 0
+    weight = max(initial_weight, 1.0)
+
+    def push(state: Hashable) -> None:
+        nonlocal tiebreak
+        key = g_costs[state] + weight * heuristic(state)
+        open_keys[state] = key
+        heappush(frontier, (key, tiebreak, state))
+        tiebreak += 1
+        stats.pushes += 1
+
+    def top_key() -> float:
+        while frontier:
+            key, _, state = frontier[0]
+            if open_keys.get(state) == key:
+                return key
+            heappop(frontier)
+        return inf
+
+    def improve_path() -> bool:
+        nonlocal goal_state
+        while top_key() < (g_costs[goal_state] if goal_state is not None else inf):
+            if perf_counter() >= deadline:
+                return False
+            _, _, state = heappop(frontier)
+            del open_keys[state]
+            closed.add(state)
+            stats.expansions += 1
+            if is_goal(state):
+                if goal_state is None or g_costs[state] < g_costs[goal_state]:
+                    goal_state = state
+                continue
+            state_cost = g_costs[state]
+            for adj_state, edge_cost in successors(state):
+                adj_cost = state_cost + edge_cost
+                if adj_cost < g_costs.get(adj_state, inf):
+                    g_costs[adj_state] = adj_cost
+                    parents[adj_state] = state
+                    if adj_state in closed:
+                        inconsistent.add(adj_state)
+                    else:
+                        push(adj_state)
+            stats.peak_frontier = max(stats.peak_frontier, len(open_keys))
+        return True
+
+    def lower_bound() -> float:
+        return min((g_costs[state] + heuristic(state) for state in (*open_keys, *inconsistent)), default=inf)
+
+    completed_weight = inf
+    yielded_cost = inf
+    push(initial_state)
+    while True:
+        finished = improve_path()
+        if finished:
+            completed_weight = weight
+        if goal_state is not None and g_costs[goal_state] < yielded_cost:
+            stats.peak_reached = len(g_costs)
+            stats.wall_time = perf_counter() - start_time
+            goal_cost, solution_lower_bound = g_costs[goal_state], lower_bound()
+            suboptimality = min(completed_weight, goal_cost / solution_lower_bound) \
+                if solution_lower_bound > 0 else completed_weight
+            suboptimality = max(suboptimality, 1.0)
+            node = _reconstruct_path(goal_state, parents, g_costs, heuristic)
+            solution_weight = weight if finished or completed_weight == inf else completed_weight
+            yield AnytimeSolution(node=node, weight=solution_weight, suboptimality=suboptimality, stats=replace(stats))
+            yielded_cost = goal_cost
+            if suboptimality <= suboptimality_bound:
+                return
+        if not finished or weight == 1.0 or (goal_state is None and not open_keys):
+            return
+
+        weight = max(1.0, weight - weight_step)
+        for state in inconsistent:
+            open_keys[state] = 0
+        inconsistent.clear()
+        closed.clear()
+        frontier[:] = []
+        for state in open_keys:
+            key = g_costs[state] + weight * heuristic(state)
+            open_keys[state] = key
+            frontier.append((key, tiebreak, state))
+            tiebreak += 1
+        heapify(frontier)
+
+
+if __name__ == '__main__':
+    problem = grid_problem(150, 150, seed=0)
+
+    for solution in ara_star(problem, initial_weight=3.0, weight_step=0.5, time_budget=5.0):
+        print(f'weight={solution.weight:.1f} cost={solution.node.cost} '
+              f'suboptimality<={solution.suboptimality:.3f} expansions={solution.stats.expansions} '
+              f'elapsed={solution.stats.wall_time:.3f}s')
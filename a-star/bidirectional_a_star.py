@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from heapq import heappop, heappush
+from math import inf
+from time import perf_counter
+
+from a_star import Node, Problem, SearchStats, a_star_search
+from graph import Graph
+
+
+def bidirectional_a_star(problem: Problem,
+                         reverse_heuristics: dict[str, int] | None = None,
+                         reverse_graph: Graph[str] | None = None) -> Node | None:
+    node, _ = bidirectional_a_star_search(problem, reverse_heuristics, reverse_graph)
+    return node
+
+
+def bidirectional_a_star_search(problem: Problem,
+                                reverse_heuristics: dict[str, int] | None = None,
+                                reverse_graph: Graph[str] | None = None) -> tuple[Node | None, SearchStats]:
+    start_time = perf_counter()
+    graph = problem.graph
+    heuristics = problem.heuristics
+    initial_state = problem.initial_node.state
+    goal_state = problem.goal_state
+    if reverse_graph is None:
+        reverse_graph = reverse(graph)
+
+    def reverse_heuristic(state: str) -> float:
+        if reverse_heuristics is not None:
+            return reverse_heuristics[state]
+        return max(0, heuristics[initial_state] - heuristics[state])
+
+    def forward_potential(state: str) -> float:
+        return (heuristics[state] - reverse_heuristic(state)) / 2
+
+    def backward_potential(state: str) -> float:
+        return -forward_potential(state)
+
+    sides = (
+        _Side(graph, forward_potential, initial_state),
+        _Side(reverse_graph, backward_potential, goal_state),
+    )
+    forward, backward = sides
+
+    best_cost = 0 if initial_state == goal_state else inf
+    meeting_state = initial_state if initial_state == goal_state else None
+    stats = SearchStats(pushes=2, peak_frontier=2)
+    while forward.frontier and backward.frontier:
+        forward.discard_closed()
+        backward.discard_closed()
+        if not forward.frontier or not backward.frontier:
+            break
+        if forward.top_key() + backward.top_key() >= best_cost:
+            break
+
+        side, other = sides if forward.top_key() <= backward.top_key() else sides[::-1]
+        stats.expansions += 1
+        for adj_state, adj_cost in side.expand():
+            if adj_state in other.g_costs and adj_cost + other.g_costs[adj_state] < best_cost:
+                best_cost = adj_cost + other.g_costs[adj_state]
+                meeting_state = adj_state
+        stats.peak_frontier = max(stats.peak_frontier, len(forward.frontier) + len(backward.frontier))
+
+    stats.pushes = forward.pushes + backward.pushes
+    stats.reopenings = forward.reopenings + backward.reopenings
+    stats.peak_reached = len(forward.g_costs) + len(backward.g_costs)
+    result = None
+    if meeting_state is not None:
+        result = _join_paths(problem, forward, backward, meeting_state, best_cost)
+    stats.wall_time = perf_counter() - start_time
+    return result, stats
+
+
+def reverse(graph: Graph[str]) -> Graph[str]:
+    reverse_graph = Graph[str]()
+    for node in graph.nodes():
+        reverse_graph.add_node(node)
+    for a_node, b_node in graph.edges():
+        reverse_graph.add_edge(b_node, a_node, graph.edge_cost(a_node, b_node))
+    return reverse_graph
+
+
+class _Side:
+
+    def __init__(self, graph: Graph[str], potential, root: str):
+        self._graph = graph
+        self._potential = potential
+        self.g_costs = {root: 0}
+        self.parents = {root: None}
+        self.closed = set()
+        self.frontier = [(potential(root), 0, root)]
+        self.pushes = 1
+        self.reopenings = 0
+
+    def top_key(self) -> float:
+        return self.frontier[0][0]
+
+    def discard_closed(self) -> None:
+        while self.frontier and self.frontier[0][2] in self.closed:
+            heappop(self.frontier)
+
+    def expand(self):
+        _, _, state = heappop(self.frontier)
+        self.closed.add(state)
+        state_cost = self.g_costs[state]
+        for adj_state in self._graph.adj(state):
+            adj_cost = state_cost + self._graph.edge_cost(state, adj_state)
+            if adj_cost < self.g_costs.get(adj_state, inf):
+                self.g_costs[adj_state] = adj_cost
+                self.parents[adj_state] = state
+                if adj_state in self.closed:
+                    self.closed.remove(adj_state)
+                    self.reopenings += 1
+                heappush(self.frontier, (adj_cost + self._potential(adj_state), self.pushes, adj_state))
+                self.pushes += 1
+                yield adj_state, adj_cost
+
+
+def _join_paths(problem: Problem, forward: _Side, backward: _Side, meeting_state: str, best_cost: float) -> Node:
+    path = []
+    state = meeting_state
+    while state is not None:
+        path.append((state, forward.g_costs[state]))
+        state = forward.parents[state]
+    path.reverse()
+    state = backward.parents[meeting_state]
+    while state is not None:
+        path.append((state, best_cost - backward.g_costs[state]))
+        state = backward.parents[state]
+
+    heuristics = problem.heuristics
+    offset = problem.initial_node.cost - heuristics[problem.initial_node.state]
+    node = None
+    for state, g_cost in path:
+        node = Node(state=state, cost=offset + g_cost + heuristics[state], parent=node)
+    return node
+
+
+if __name__ == '__main__':
+    graph = Graph[str]()
+
+    for state in ['A', 'B', 'C', 'D', 'E', 'F', 'G']:
+        graph.add_node(state)
+
+    graph.add_bidirectional_edge('A', 'B', cost=1)
+    graph.add_bidirectional_edge('A', 'C', cost=4)
+    graph.add_bidirectional_edge('B', 'C', cost=1)
+    graph.add_bidirectional_edge('B', 'D', cost=5)
+    graph.add_bidirectional_edge('C', 'D', cost=3)
+    graph.add_bidirectional_edge('D', 'E', cost=8)
+    graph.add_bidirectional_edge('D', 'G', cost=9)
+    graph.add_bidirectional_edge('D', 'F', cost=3)
+    graph.add_bidirectional_edge('E', 'G', cost=2)
+    graph.add_bidirectional_edge('F', 'G', cost=5)
+
+    heuristics = {
+        'A': 9.5,
+        'B': 9,
+        'C': 8,
+        'D': 7,
+        'E': 1.5,
+        'F': 4,
+        'G': 0
+    }
+
+    initial_node = Node(state='A', cost=heuristics['A'])
+    problem = Problem(initial_node=initial_node, goal_state='G', graph=graph, heuristics=heuristics)
+
+    node, stats = a_star_search(problem)
+    print(node)
+    print(stats)
+    node, stats = bidirectional_a_star_search(problem)
+    print(node)
+    print(stats)
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import random
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from heapq import heappop, heappush
+from math import inf
+
+from a_star import Node, Problem, a_star
+from graph import Graph
+from search_problems import ManhattanHeuristics, grid_graph
+
+
+class ContractionHierarchy:
+    WITNESS_SETTLE_LIMIT = 64
+
+    def __init__(self,
+                 nodes: list[str],
+                 ranks: array,
+                 up: tuple[array, array, array, array],
+                 down: tuple[array, array, array, array]):
+        self._nodes = nodes
+        self._ids = {node: node_id for node_id, node in enumerate(nodes)}
+        self._ranks = ranks
+        self._up = up
+        self._down = down
+
+    @classmethod
+    def build(cls, graph: Graph[str]) -> ContractionHierarchy:
+        nodes = graph.nodes()
+        ids = {node: node_id for node_id, node in enumerate(nodes)}
+        n = len(nodes)
+        out_edges: list[dict[int, float]] = [{} for _ in range(n)]
+        in_edges: list[dict[int, float]] = [{} for _ in range(n)]
+        middles: dict[tuple[int, int], int] = {}
+        for a_node, b_node in graph.edges():
+            a_id, b_id = ids[a_node], ids[b_node]
+            cost = graph.edge_cost(a_node, b_node)
+            if a_id != b_id and cost < out_edges[a_id].get(b_id, inf):
+                out_edges[a_id][b_id] = cost
+                in_edges[b_id][a_id] = cost
+
+        def witness_cost(source: int, excluded: int, targets: set[int], max_cost: float) -> dict[int, float]:
+            costs = {source: 0}
+            frontier = [(0, source)]
+            settled = 0
+            remaining = set(targets)
+            while frontier and remaining and settled < cls.WITNESS_SETTLE_LIMIT:
+                cost, node_id = heappop(frontier)
+                if cost > costs[node_id]:
+                    continue
+                if cost > max_cost:
+                    break
+                remaining.discard(node_id)
+                settled += 1
+                for adj_id, edge_cost in out_edges[node_id].items():
+                    adj_cost = cost + edge_cost
+                    if adj_id != excluded and adj_cost < costs.get(adj_id, inf):
+                        costs[adj_id] = adj_cost
+                        heappush(frontier, (adj_cost, adj_id))
+            return costs
+
+        def shortcuts(node_id: int) -> list[tuple[int, int, float]]:
+            result = []
+            out_node = out_edges[node_id]
+            if not out_node:
+                return result
+            max_out_cost = max(out_node.values())
+            for in_id, in_cost in in_edges[node_id].items():
+                targets = {out_id for out_id in out_node if out_id != in_id}
+                if not targets:
+                    continue
+                costs = witness_cost(in_id, node_id, targets, in_cost + max_out_cost)
+                for out_id in targets:
+                    shortcut_cost = in_cost + out_node[out_id]
+                    if costs.get(out_id, inf) > shortcut_cost:
+                        result.append((in_id, out_id, shortcut_cost))
+            return result
+
+        deleted_neighbors = [0] * n
+
+        def priority(node_id: int) -> tuple[int, list[tuple[int, int, float]]]:
+            node_shortcuts = shortcuts(node_id)
+            edge_difference = len(node_shortcuts) - len(in_edges[node_id]) - len(out_edges[node_id])
+            return edge_difference + deleted_neighbors[node_id], node_shortcuts
+
+        ranks = array('l', [0]) * n
+        up_edges: list[dict[int, float]] = [{} for _ in range(n)]
+        down_edges: list[dict[int, float]] = [{} for _ in range(n)]
+        queue = [(priority(node_id)[0], node_id) for node_id in range(n)]
+        queue.sort()
+        rank = 0
+        while queue:
+            _, node_id = heappop(queue)
+            node_priority, node_shortcuts = priority(node_id)
+            if queue and node_priority > queue[0][0]:
+                heappush(queue, (node_priority, node_id))
+                continue
+
+            for in_id, out_id, shortcut_cost in node_shortcuts:
+                if shortcut_cost < out_edges[in_id].get(out_id, inf):
+                    out_edges[in_id][out_id] = shortcut_cost
+                    in_edges[out_id][in_id] = shortcut_cost
+                    middles[(in_id, out_id)] = node_id
+
+            ranks[node_id] = rank
+            rank += 1
+            up_edges[node_id] = out_edges[node_id]
+            down_edges[node_id] = in_edges[node_id]
+            for in_id in in_edges[node_id]:
+                del out_edges[in_id][node_id]
+                deleted_neighbors[in_id] += 1
+            for out_id in out_edges[node_id]:
+                del in_edges[out_id][node_id]
+                deleted_neighbors[out_id] += 1
+            out_edges[node_id] = {}
+            in_edges[node_id] = {}
+
+        up = _csr(up_edges, lambda node_id, adj_id: middles.get((node_id, adj_id), -1))
+        down = _csr(down_edges, lambda node_id, adj_id: middles.get((adj_id, node_id), -1))
+        return cls(nodes, ranks, up, down)
+
+    def distance(self, initial_state: str, goal_state: str) -> float:
+        cost, _, _, _ = self._search(self._ids[initial_state], self._ids[goal_state])
+        return cost
+
+    def shortest_path(self, initial_state: str, goal_state: str) -> list[str] | None:
+        cost, meeting_id, forward_parents, backward_parents = self._search(self._ids[initial_state],
+                                                                           self._ids[goal_state])
+        if cost == inf:
+            return None
+
+        hierarchy_path = []
+        node_id = meeting_id
+        while node_id != -1:
+            hierarchy_path.append(node_id)
+            node_id = forward_parents[node_id]
+        hierarchy_path.reverse()
+        node_id = backward_parents[meeting_id]
+        while node_id != -1:
+            hierarchy_path.append(node_id)
+            node_id = backward_parents[node_id]
+
+        path = [hierarchy_path[0]]
+        for a_id, b_id in zip(hierarchy_path, hierarchy_path[1:]):
+            self._unpack(a_id, b_id, path)
+        return [self._nodes[node_id] for node_id in path]
+
+    def nbytes(self) -> int:
+        buffers = (self._ranks,) + self._up + self._down
+        return sum(len(buffer) * buffer.itemsize for buffer in buffers)
+
+    def num_shortcuts(self) -> int:
+        return sum(1 for middle in self._up[3] if middle != -1) + sum(1 for middle in self._down[3] if middle != -1)
+
+    def _search(self, source: int, target: int) -> tuple[float, int, dict[int, int], dict[int, int]]:
+        forward_costs, backward_costs = {source: 0}, {target: 0}
+        forward_parents, backward_parents = {source: -1}, {target: -1}
+        forward_frontier, backward_frontier = [(0, source)], [(0, target)]
+        best_cost = 0 if source == target else inf
+        meeting_id = source
+
+        searches = (
+            (forward_frontier, forward_costs, forward_parents, self._up, self._down, backward_costs),
+            (backward_frontier, backward_costs, backward_parents, self._down, self._up, forward_costs),
+        )
+        forward_turn = True
+        while forward_frontier or backward_frontier:
+            if not forward_frontier:
+                forward_turn = False
+            elif not backward_frontier:
+                forward_turn = True
+            frontier, costs, parents, edges, stall_edges, other_costs = searches[not forward_turn]
+            forward_turn = not forward_turn
+
+            cost, node_id = heappop(frontier)
+            if cost > costs[node_id]:
+                continue
+            if cost >= best_cost:
+                frontier.clear()
+                continue
+            if self._is_stalled(node_id, cost, costs, stall_edges):
+                continue
+            offsets, targets, edge_costs, _ = edges
+            for i in range(offsets[node_id], offsets[node_id + 1]):
+                adj_id = targets[i]
+                adj_cost = cost + edge_costs[i]
+                if adj_cost < costs.get(adj_id, inf):
+                    costs[adj_id] = adj_cost
+                    parents[adj_id] = node_id
+                    heappush(frontier, (adj_cost, adj_id))
+                    if adj_id in other_costs and adj_cost + other_costs[adj_id] < best_cost:
+                        best_cost = adj_cost + other_costs[adj_id]
+                        meeting_id = adj_id
+        return best_cost, meeting_id, forward_parents, backward_parents
+
+    @staticmethod
+    def _is_stalled(node_id: int, cost: float, costs: dict[int, float], stall_edges: tuple) -> bool:
+        offsets, targets, edge_costs, _ = stall_edges
+        for i in range(offsets[node_id], offsets[node_id + 1]):
+            if costs.get(targets[i], inf) + edge_costs[i] < cost:
+                return True
+        return False
+
+    def _unpack(self, a_id: int, b_id: int, path: list[int]) -> None:
+        if self._ranks[a_id] < self._ranks[b_id]:
+            offsets, targets, _, middles = self._up
+            row_id, adj_id = a_id, b_id
+        else:
+            offsets, targets, _, middles = self._down
+            row_id, adj_id = b_id, a_id
+        i = bisect_left(targets, adj_id, offsets[row_id], offsets[row_id + 1])
+        middle = middles[i]
+        if middle == -1:
+            path.append(b_id)
+            return
+        self._unpack(a_id, middle, path)
+        self._unpack(middle, b_id, path)
+
+
+def _csr(rows: list[dict[int, float]], middle_of) -> tuple[array, array, array, array]:
+    offsets, targets, costs, middles = array('q', [0]), array('l'), array('d'), array('l')
+    for node_id, row in enumerate(rows):
+        for adj_id in sorted(row):
+            targets.append(adj_id)
+            costs.append(row[adj_id])
+            middles.append(middle_of(node_id, adj_id))
+        offsets.append(len(targets))
+    return offsets, targets, costs, middles
+
+
+if __name__ == '__main__':
+    side = int(sys.argv[1]) if len(sys.argv) > 1 else 316
+    tot_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    graph = grid_graph(side, side, seed=0)
+    print(f'grid: {len(graph)} nodes, {len(graph.edges())} edges')
+
+    start = time.perf_counter()
+    hierarchy = ContractionHierarchy.build(graph)
+    print(f'build: {time.perf_counter() - start:.1f}s, {hierarchy.num_shortcuts()} shortcuts, '
+          f'{hierarchy.nbytes() / 2 ** 20:.1f} MiB')
+
+    rng = random.Random(0)
+    nodes = graph.nodes()
+    queries = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(tot_queries)]
+
+    start = time.perf_counter()
+    a_star_costs = []
+    for initial_state, goal_state in queries:
+        heuristics = ManhattanHeuristics(goal_state)
+        initial_node = Node(state=initial_state, cost=heuristics[initial_state])
+        problem = Problem(initial_node=initial_node, goal_state=goal_state, graph=graph, heuristics=heuristics)
+        a_star_costs.append(a_star(problem).cost)
+    a_star_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hierarchy_costs = [hierarchy.distance(initial_state, goal_state) for initial_state, goal_state in queries]
+    hierarchy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for initial_state, goal_state in queries:
+        hierarchy.shortest_path(initial_state, goal_state)
+    path_time = time.perf_counter() - start
+
+    if a_star_costs != hierarchy_costs:
+        raise AssertionError('contraction hierarchy and a_star disagree!')
+    print(f'a_star:        {a_star_time / tot_queries * 1000:.3f} ms/query')
+    print(f'distance:      {hierarchy_time / tot_queries * 1000:.3f} ms/query')
+    print(f'shortest_path: {path_time / tot_queries * 1000:.3f} ms/query')
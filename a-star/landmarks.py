@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import os
+import struct
+import tempfile
+from array import array
+from heapq import heappop, heappush
+from math import inf
+from zlib import crc32
+
+from a_star import Node, Problem, a_star
+from graph import Graph
+
+
+class Landmarks:
+    FILE_MAGIC = b'LANDMARK'
+    _FILE_HEADER = struct.Struct('<8sQQQQ')
+
+    def __init__(self,
+                 graph: Graph[str],
+                 landmarks: list[int],
+                 from_landmarks: array,
+                 to_landmarks: array):
+        nodes = graph.nodes()
+        self._graph = graph
+        self._version = graph.version()
+        self._nodes = nodes
+        self._ids = {node: node_id for node_id, node in enumerate(nodes)}
+        self._landmarks = landmarks
+        self._from_landmarks = from_landmarks
+        self._to_landmarks = to_landmarks
+
+    @classmethod
+    def precompute(cls, graph: Graph[str], k: int) -> Landmarks:
+        nodes = graph.nodes()
+        if not 0 < k <= len(nodes):
+            raise ValueError("k must be between 1 and the number of nodes!")
+        ids = {node: node_id for node_id, node in enumerate(nodes)}
+        successors = [[] for _ in nodes]
+        predecessors = [[] for _ in nodes]
+        for a_node, b_node in graph.edges():
+            cost = graph.edge_cost(a_node, b_node)
+            successors[ids[a_node]].append((ids[b_node], cost))
+            predecessors[ids[b_node]].append((ids[a_node], cost))
+
+        n = len(nodes)
+        from_landmarks = array('d', [inf]) * (n * k)
+        to_landmarks = array('d', [inf]) * (n * k)
+        closest_landmark = [inf] * n
+        landmarks = []
+        landmark = 0
+        for i in range(k):
+            landmarks.append(landmark)
+            from_distances = _dijkstra(successors, landmark)
+            to_distances = _dijkstra(predecessors, landmark)
+            for node_id in range(n):
+                from_landmarks[node_id * k + i] = from_distances[node_id]
+                to_landmarks[node_id * k + i] = to_distances[node_id]
+                distance = min(from_distances[node_id], to_distances[node_id])
+                closest_landmark[node_id] = min(closest_landmark[node_id], distance)
+            landmark = _farthest(closest_landmark, landmarks)
+        return cls(graph, landmarks, from_landmarks, to_landmarks)
+
+    @classmethod
+    def load(cls, path: str, graph: Graph[str]) -> Landmarks:
+        with open(path, 'rb') as file:
+            header = file.read(cls._FILE_HEADER.size)
+            if len(header) != cls._FILE_HEADER.size:
+                raise ValueError(f"{path} is not a landmarks file!")
+            magic, num_nodes, num_edges, checksum, k = cls._FILE_HEADER.unpack(header)
+            if magic != cls.FILE_MAGIC:
+                raise ValueError(f"{path} is not a landmarks file!")
+            if (num_nodes, num_edges, checksum) != _fingerprint(graph):
+                raise ValueError(f"{path} was computed for a different graph!")
+            landmarks, from_landmarks, to_landmarks = array('q'), array('d'), array('d')
+            try:
+                landmarks.fromfile(file, k)
+                from_landmarks.fromfile(file, num_nodes * k)
+                to_landmarks.fromfile(file, num_nodes * k)
+            except EOFError:
+                raise ValueError(f"{path} is truncated!")
+        return cls(graph, list(landmarks), from_landmarks, to_landmarks)
+
+    def save(self, path: str) -> None:
+        self._check_version()
+        with open(path, 'wb') as file:
+            file.write(self._FILE_HEADER.pack(self.FILE_MAGIC, *_fingerprint(self._graph), len(self._landmarks)))
+            array('q', self._landmarks).tofile(file)
+            self._from_landmarks.tofile(file)
+            self._to_landmarks.tofile(file)
+
+    def landmarks(self) -> list[str]:
+        return [self._nodes[landmark] for landmark in self._landmarks]
+
+    def heuristic(self, state: str, goal_state: str) -> float:
+        return self.heuristics(goal_state)[state]
+
+    def heuristics(self, goal_state: str) -> LandmarkHeuristics:
+        self._check_version()
+        return LandmarkHeuristics(self, goal_state)
+
+    def __len__(self) -> int:
+        return len(self._landmarks)
+
+    def _check_version(self) -> None:
+        if self._graph.version() != self._version:
+            raise ValueError("Landmarks were computed for an older version of the graph!")
+
+
+class LandmarkHeuristics:
+
+    def __init__(self, landmarks: Landmarks, goal_state: str):
+        k = len(landmarks)
+        goal_id = landmarks._ids[goal_state]
+        self._k = k
+        self._ids = landmarks._ids
+        self._from_landmarks = landmarks._from_landmarks
+        self._to_landmarks = landmarks._to_landmarks
+        self._goal_from_landmarks = self._from_landmarks[goal_id * k:(goal_id + 1) * k]
+        self._goal_to_landmarks = self._to_landmarks[goal_id * k:(goal_id + 1) * k]
+
+    def __getitem__(self, state: str) -> float:
+        k = self._k
+        base = self._ids[state] * k
+        from_landmarks = self._from_landmarks
+        to_landmarks = self._to_landmarks
+        estimate = 0
+        for i in range(k):
+            goal_from, state_from = self._goal_from_landmarks[i], from_landmarks[base + i]
+            if state_from != inf and goal_from - state_from > estimate:
+                estimate = goal_from - state_from
+            state_to, goal_to = to_landmarks[base + i], self._goal_to_landmarks[i]
+            if goal_to != inf and state_to - goal_to > estimate:
+                estimate = state_to - goal_to
+        return estimate
+
+
+def _fingerprint(graph: Graph[str]) -> tuple[int, int, int]:
+    nodes = graph.nodes()
+    label_checksum = 0
+    for node in nodes:
+        label_checksum = crc32(node.encode('utf-8') + b'\0', label_checksum)
+    edges = graph.edges()
+    edge_checksum = 0
+    for a_node, b_node in edges:
+        edge = f'{a_node}\0{b_node}\0{float(graph.edge_cost(a_node, b_node)).hex()}'.encode('utf-8')
+        edge_checksum = (edge_checksum + crc32(edge)) & 0xFFFFFFFF
+    return len(nodes), len(edges), label_checksum << 32 | edge_checksum
+
+
+def _dijkstra(adjacency: list[list[tuple[int, int]]], source: int) -> list[float]:
+    distances = [inf] * len(adjacency)
+    distances[source] = 0
+    frontier = [(0, source)]
+    while frontier:
+        distance, node_id = heappop(frontier)
+        if distance > distances[node_id]:
+            continue
+        for adj_id, cost in adjacency[node_id]:
+            adj_distance = distance + cost
+            if adj_distance < distances[adj_id]:
+                distances[adj_id] = adj_distance
+                heappush(frontier, (adj_distance, adj_id))
+    return distances
+
+
+def _farthest(closest_landmark: list[float], landmarks: list[int]) -> int:
+    chosen = set(landmarks)
+    farthest, farthest_distance = None, -inf
+    for node_id, distance in enumerate(closest_landmark):
+        if node_id in chosen:
+            continue
+        if distance == inf:
+            return node_id
+        if distance > farthest_distance:
+            farthest, farthest_distance = node_id, distance
+    return farthest
+
+
+if __name__ == '__main__':
+    graph = Graph[str]()
+
+    for state in ['A', 'B', 'C', 'D', 'E', 'F', 'G']:
+        graph.add_node(state)
+
+    graph.add_bidirectional_edge('A', 'B', cost=1)
+    graph.add_bidirectional_edge('A', 'C', cost=4)
+    graph.add_bidirectional_edge('B', 'C', cost=1)
+    graph.add_bidirectional_edge('B', 'D', cost=5)
+    graph.add_bidirectional_edge('C', 'D', cost=3)
+    graph.add_bidirectional_edge('D', 'E', cost=8)
+    graph.add_bidirectional_edge('D', 'G', cost=9)
+    graph.add_bidirectional_edge('D', 'F', cost=3)
+    graph.add_bidirectional_edge('E', 'G', cost=2)
+    graph.add_bidirectional_edge('F', 'G', cost=5)
+
+    landmarks = Landmarks.precompute(graph, k=2)
+    print(f'landmarks: {landmarks.landmarks()}')
+
+    heuristics = landmarks.heuristics('G')
+    initial_node = Node(state='A', cost=heuristics['A'])
+    problem = Problem(initial_node=initial_node, goal_state='G', graph=graph, heuristics=heuristics)
+
+    print(a_star(problem))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'landmarks.bin')
+        landmarks.save(path)
+        loaded = Landmarks.load(path, graph)
+        print(f'loaded landmarks: {loaded.landmarks()}, h(A)={loaded.heuristic("A", "G")}')
+
+        graph.update_edge_cost('D', 'G', 1)
+        for stale in (lambda: landmarks.heuristics('G'), lambda: Landmarks.load(path, graph)):
+            try:
+                stale()
+                raise AssertionError('stale landmark tables were accepted!')
+            except ValueError as error:
+                print(f'rejected: {error}')
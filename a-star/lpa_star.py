@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import random
+import time
+from heapq import heappop, heappush
+from math import inf
+
+from a_star import Node, Problem, a_star_search
+from search_problems import grid_problem
+
+
+class LPAStar:
+
+    def __init__(self, problem: Problem):
+        self._problem = problem
+        self._graph = problem.graph
+        self._heuristics = problem.heuristics
+        self._initial_state = problem.initial_node.state
+        self._offset = problem.initial_node.cost - self._heuristics[self._initial_state]
+
+        self._predecessors: dict[str, set[str]] = {}
+        for a_node, b_node in self._graph.edges():
+            self._check_cost(self._graph.edge_cost(a_node, b_node))
+            self._predecessors.setdefault(b_node, set()).add(a_node)
+
+        self._g_costs: dict[str, tuple[float, float]] = {}
+        self._rhs_costs: dict[str, tuple[float, float]] = {self._initial_state: (0, 0)}
+        self._keys: dict[str, tuple[float, float, float]] = {}
+        self._frontier: list[tuple[float, float, float, int, str]] = []
+        self._tiebreak = 0
+        self._changed_states: set[str] = set()
+        self._negative_edges: set[tuple[str, str]] = set()
+        self.expansions = 0
+
+        self._insert(self._initial_state)
+        self._graph.subscribe(self._on_edge_cost)
+
+    def plan(self) -> Node | None:
+        self._negative_edges = {(a_node, b_node) for a_node, b_node in self._negative_edges
+                                if self._graph.edge_cost(a_node, b_node) < 0}
+        if self._negative_edges:
+            self._check_cost(min(self._graph.edge_cost(a_node, b_node) for a_node, b_node in self._negative_edges))
+
+        for state in self._changed_states:
+            self._update_state(state)
+        self._changed_states.clear()
+
+        self.expansions = 0
+        self._compute_shortest_path()
+        return self._extract_path()
+
+    def close(self) -> None:
+        self._graph.unsubscribe(self._on_edge_cost)
+
+    def _on_edge_cost(self, a_node: str, b_node: str, cost: int) -> None:
+        if cost < 0:
+            self._negative_edges.add((a_node, b_node))
+        self._predecessors.setdefault(b_node, set()).add(a_node)
+        self._changed_states.add(b_node)
+
+    @staticmethod
+    def _check_cost(cost: int) -> None:
+        if cost < 0:
+            raise ValueError("LPAStar requires non-negative edge costs!")
+
+    def _key(self, state: str) -> tuple[float, float, float]:
+        cost, hops = min(self._g_costs.get(state, _UNREACHED), self._rhs_costs.get(state, _UNREACHED))
+        return cost + self._heuristics[state], cost, hops
+
+    def _insert(self, state: str) -> None:
+        key = self._key(state)
+        self._keys[state] = key
+        heappush(self._frontier, (*key, self._tiebreak, state))
+        self._tiebreak += 1
+
+    def _update_state(self, state: str) -> None:
+        if state != self._initial_state:
+            graph = self._graph
+            g_costs = self._g_costs
+            self._rhs_costs[state] = min(
+                (self._extend(g_costs.get(predecessor, _UNREACHED), graph.edge_cost(predecessor, state))
+                 for predecessor in self._predecessors.get(state, ())),
+                default=_UNREACHED
+            )
+        self._keys.pop(state, None)
+        if self._g_costs.get(state, _UNREACHED) != self._rhs_costs.get(state, _UNREACHED):
+            self._insert(state)
+
+    @staticmethod
+    def _extend(cost: tuple[float, float], edge_cost: int) -> tuple[float, float]:
+        return cost[0] + edge_cost, cost[1] + 1
+
+    def _top_key(self) -> tuple[float, float, float]:
+        frontier = self._frontier
+        while frontier:
+            k1, k2, k3, _, state = frontier[0]
+            if self._keys.get(state) == (k1, k2, k3):
+                return k1, k2, k3
+            heappop(frontier)
+        return inf, inf, inf
+
+    def _compute_shortest_path(self) -> None:
+        goal_state = self._problem.goal_state
+        g_costs, rhs_costs = self._g_costs, self._rhs_costs
+        while self._top_key() < self._key(goal_state) \
+                or rhs_costs.get(goal_state, _UNREACHED) != g_costs.get(goal_state, _UNREACHED):
+            if not self._frontier:
+                return
+            *_, state = heappop(self._frontier)
+            del self._keys[state]
+            self.expansions += 1
+            if g_costs.get(state, _UNREACHED) > rhs_costs.get(state, _UNREACHED):
+                g_costs[state] = rhs_costs[state]
+                for adj_state in self._graph.adj(state):
+                    self._update_state(adj_state)
+            else:
+                g_costs[state] = _UNREACHED
+                self._update_state(state)
+                for adj_state in self._graph.adj(state):
+                    self._update_state(adj_state)
+
+    def _extract_path(self) -> Node | None:
+        goal_state = self._problem.goal_state
+        g_costs = self._g_costs
+        if g_costs.get(goal_state, _UNREACHED) == _UNREACHED:
+            return None
+
+        path = [goal_state]
+        state = goal_state
+        while state != self._initial_state:
+            state = min(self._predecessors[state],
+                        key=lambda predecessor: self._extend(g_costs.get(predecessor, _UNREACHED),
+                                                             self._graph.edge_cost(predecessor, state)))
+            path.append(state)
+
+        node = None
+        for state in reversed(path):
+            node = Node(state=state, cost=self._offset + g_costs[state][0] + self._heuristics[state], parent=node)
+        return node
+
+
+_UNREACHED = (inf, inf)
+
+
+if __name__ == '__main__':
+    problem = grid_problem(100, 100, seed=0)
+    graph = problem.graph
+    planner = LPAStar(problem)
+
+    start = time.perf_counter()
+    node = planner.plan()
+    print(f'initial plan: cost={node.cost} expansions={planner.expansions} '
+          f'time={time.perf_counter() - start:.3f}s')
+
+    rng = random.Random(0)
+    edges = graph.edges()
+    for batch in range(5):
+        for a_state, b_state in rng.sample(edges, 10):
+            graph.update_edge_cost(a_state, b_state, rng.randint(1, 9))
+
+        start = time.perf_counter()
+        node = planner.plan()
+        replan_time = time.perf_counter() - start
+
+        fresh_node, fresh_stats = a_star_search(problem)
+
+        print(f'batch {batch}: cost={node.cost} expansions={planner.expansions} time={replan_time:.3f}s | '
+              f'a_star cost={fresh_node.cost} expansions={fresh_stats.expansions} time={fresh_stats.wall_time:.3f}s')
+    planner.close()
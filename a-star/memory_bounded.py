@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import sys
+from heapq import heappop, heappush
+from math import inf
+from time import perf_counter
+from typing import Hashable
+
+from a_star import Node, SearchProblem, SearchStats, a_star_search
+from search_problems import sliding_puzzle_problem
+
+
+def ida_star(problem: SearchProblem) -> tuple[Node | None, SearchStats]:
+    start_time = perf_counter()
+    successors = problem.successors
+    heuristic = problem.heuristic
+    is_goal = problem.is_goal
+    initial_state = problem.initial_node.state
+    initial_cost = problem.initial_node.cost - heuristic(initial_state)
+
+    stats = SearchStats(pushes=1, peak_frontier=1, peak_reached=1)
+    bound = initial_cost + heuristic(initial_state)
+    previous_bound = -inf
+    while bound < inf:
+        if is_goal(initial_state):
+            stats.wall_time = perf_counter() - start_time
+            return _path_to_node([initial_state], [initial_cost], heuristic), stats
+
+        path, costs, on_path = [initial_state], [initial_cost], {initial_state}
+        stack = [iter(successors(initial_state))]
+        stats.expansions += 1
+        if bound <= previous_bound:
+            stats.regenerations += 1
+        next_bound = inf
+        while stack:
+            try:
+                state, edge_cost = next(stack[-1])
+            except StopIteration:
+                stack.pop()
+                on_path.remove(path.pop())
+                costs.pop()
+                continue
+            if state in on_path:
+                continue
+
+            cost = costs[-1] + edge_cost
+            priority = cost + heuristic(state)
+            stats.pushes += 1
+            if priority > bound:
+                next_bound = min(next_bound, priority)
+                continue
+            path.append(state)
+            costs.append(cost)
+            if is_goal(state):
+                stats.wall_time = perf_counter() - start_time
+                return _path_to_node(path, costs, heuristic), stats
+
+            on_path.add(state)
+            stack.append(iter(successors(state)))
+            stats.expansions += 1
+            if priority <= previous_bound:
+                stats.regenerations += 1
+            stats.peak_frontier = max(stats.peak_frontier, len(stack))
+            stats.peak_reached = max(stats.peak_reached, len(path))
+
+        previous_bound, bound = bound, next_bound
+
+    stats.wall_time = perf_counter() - start_time
+    return None, stats
+
+
+def sma_star(problem: SearchProblem,
+             max_nodes: int | None = None,
+             max_bytes: int | None = None) -> tuple[Node | None, SearchStats]:
+    start_time = perf_counter()
+    successors = problem.successors
+    heuristic = problem.heuristic
+    is_goal = problem.is_goal
+    initial_state = problem.initial_node.state
+
+    root = _TreeNode(initial_state, problem.initial_node.cost - heuristic(initial_state), None)
+    root.f = problem.initial_node.cost
+    if max_bytes is not None:
+        max_nodes = min(max_nodes or sys.maxsize, max_bytes // root.nbytes())
+    if max_nodes is None or max_nodes < 2:
+        raise ValueError("sma_star needs room for at least two nodes!")
+
+    stats = SearchStats(pushes=1, peak_frontier=1, peak_reached=1)
+    frontier = _Frontier()
+    frontier.push(root)
+    tot_nodes = 1
+    while True:
+        node = frontier.pop_best()
+        if node is None or node.f == inf:
+            break
+        if is_goal(node.state):
+            path, costs = [], []
+            while node is not None:
+                path.append(node.state)
+                costs.append(node.g)
+                node = node.parent
+            stats.wall_time = perf_counter() - start_time
+            return _path_to_node(path[::-1], costs[::-1], heuristic), stats
+
+        stats.expansions += 1
+        ancestors = set()
+        ancestor = node.parent
+        while ancestor is not None:
+            ancestors.add(ancestor.state)
+            ancestor = ancestor.parent
+
+        for state, edge_cost in successors(node.state):
+            if state in ancestors or state in node.children:
+                continue
+            if node.expanded:
+                if node.forgotten.get(state, inf) == inf:
+                    continue
+                stats.regenerations += 1
+            child = _TreeNode(state, node.g + edge_cost, node)
+            child.f = max(node.f, child.g + heuristic(state), node.forgotten.get(state, -inf))
+            if child.depth >= max_nodes - 1 and not is_goal(state):
+                child.f = inf
+            node.children[state] = child
+            frontier.push(child)
+            stats.pushes += 1
+            tot_nodes += 1
+        node.expanded = True
+        node.forgotten.clear()
+
+        if not node.children and node.parent is not None:
+            node.f = inf
+            _forget(node, frontier)
+            tot_nodes -= 1
+        else:
+            _backup(node, frontier)
+
+        while tot_nodes > max_nodes:
+            leaf = frontier.pop_worst()
+            if leaf is None:
+                break
+            _forget(leaf, frontier)
+            tot_nodes -= 1
+
+        stats.peak_frontier = max(stats.peak_frontier, len(frontier))
+        stats.peak_reached = max(stats.peak_reached, tot_nodes)
+
+    stats.wall_time = perf_counter() - start_time
+    return None, stats
+
+
+class _TreeNode:
+    __slots__ = ('state', 'g', 'f', 'depth', 'parent', 'children', 'forgotten', 'expanded', 'in_frontier', 'version')
+
+    def __init__(self, state: Hashable, g: float, parent: _TreeNode | None):
+        self.state = state
+        self.g = g
+        self.f = g
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.parent = parent
+        self.children: dict[Hashable, _TreeNode] = {}
+        self.forgotten: dict[Hashable, float] = {}
+        self.expanded = False
+        self.in_frontier = False
+        self.version = 0
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self) + sys.getsizeof(self.state) + sys.getsizeof(self.children) \
+            + sys.getsizeof(self.forgotten)
+
+
+class _Frontier:
+
+    def __init__(self):
+        self._best: list[tuple[float, int, int, int, _TreeNode]] = []
+        self._worst: list[tuple[float, int, int, int, _TreeNode]] = []
+        self._tiebreak = 0
+        self._size = 0
+
+    def push(self, node: _TreeNode) -> None:
+        if not node.in_frontier:
+            node.in_frontier = True
+            self._size += 1
+        node.version += 1
+        self._tiebreak += 1
+        heappush(self._best, (node.f, -node.depth, self._tiebreak, node.version, node))
+        if not node.children and node.parent is not None:
+            heappush(self._worst, (-node.f, node.depth, self._tiebreak, node.version, node))
+
+    def remove(self, node: _TreeNode) -> None:
+        if node.in_frontier:
+            node.in_frontier = False
+            self._size -= 1
+
+    def pop_best(self) -> _TreeNode | None:
+        while self._best:
+            _, _, _, version, node = heappop(self._best)
+            if node.in_frontier and node.version == version:
+                self.remove(node)
+                return node
+        return None
+
+    def pop_worst(self) -> _TreeNode | None:
+        while self._worst:
+            _, _, _, version, node = heappop(self._worst)
+            if node.in_frontier and node.version == version and not node.children:
+                self.remove(node)
+                return node
+        return None
+
+    def __len__(self) -> int:
+        return self._size
+
+
+def _forget(node: _TreeNode, frontier: _Frontier) -> None:
+    frontier.remove(node)
+    parent = node.parent
+    del parent.children[node.state]
+    parent.forgotten[node.state] = node.f
+    _backup(parent, frontier)
+    if not parent.in_frontier or not parent.children:
+        frontier.push(parent)
+
+
+def _backup(node: _TreeNode, frontier: _Frontier) -> None:
+    while node is not None:
+        f = min(min((child.f for child in node.children.values()), default=inf),
+                min(node.forgotten.values(), default=inf))
+        if f == node.f:
+            return
+        node.f = f
+        if node.in_frontier:
+            frontier.push(node)
+        node = node.parent
+
+
+def _path_to_node(path: list[Hashable], costs: list[float], heuristic) -> Node:
+    node = None
+    for state, cost in zip(path, costs):
+        node = Node(state=state, cost=cost + heuristic(state), parent=node)
+    return node
+
+
+if __name__ == '__main__':
+    puzzle = sliding_puzzle_problem((8, 6, 7, 2, 5, 4, 3, 0, 1), width=3)
+
+    node, stats = a_star_search(puzzle)
+    print(f'a_star:   {node.cost} moves, {stats}')
+    node, stats = ida_star(puzzle)
+    print(f'ida_star: {node.cost} moves, {stats}')
+    node, stats = sma_star(puzzle, max_nodes=5000)
+    print(f'sma_star: {node.cost} moves, {stats}')
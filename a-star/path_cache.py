@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable
+
+from a_star import Node, Problem, a_star
+from search_problems import ManhattanHeuristics, grid_graph
+
+
+@dataclass(slots=True, frozen=True)
+class _CachedPath:
+    states: tuple[Hashable, ...] | None
+    costs: tuple[float, ...] | None
+
+
+class PathCache:
+
+    def __init__(self, capacity: int = 1024, reuse_subpaths: bool = True):
+        if capacity < 1:
+            raise ValueError("PathCache needs room for at least one path!")
+        self._capacity = capacity
+        self._reuse_subpaths = reuse_subpaths
+        self._entries: OrderedDict[tuple[Hashable, Hashable, int], _CachedPath] = OrderedDict()
+        self._suffixes: dict[tuple[Hashable, Hashable], tuple[tuple[Hashable, Hashable, int], int]] = {}
+        self._graph = None
+        self._version = -1
+        self.hits = 0
+        self.subpath_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def a_star(self, problem: Problem) -> Node | None:
+        graph = problem.graph
+        version = graph.version()
+        if graph is not self._graph or version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self.clear()
+            self._graph = graph
+            self._version = version
+
+        initial_state = problem.initial_node.state
+        goal_state = problem.goal_state
+        key = (initial_state, goal_state, version)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._to_node(entry, 0, problem)
+
+        if self._reuse_subpaths:
+            suffix = self._suffixes.get((initial_state, goal_state))
+            if suffix is not None:
+                path_key, position = suffix
+                self._entries.move_to_end(path_key)
+                self.subpath_hits += 1
+                return self._to_node(self._entries[path_key], position, problem)
+
+        self.misses += 1
+        node = a_star(problem)
+        self._insert(key, node, problem)
+        return node
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._suffixes.clear()
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.subpath_hits + self.misses
+        return (self.hits + self.subpath_hits) / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _insert(self, key: tuple[Hashable, Hashable, int], node: Node | None, problem: Problem) -> None:
+        if node is None:
+            entry = _CachedPath(None, None)
+        else:
+            heuristic = problem.heuristic
+            states, costs = [], []
+            while node is not None:
+                states.append(node.state)
+                costs.append(node.cost - heuristic(node.state))
+                node = node.parent
+            states.reverse()
+            costs.reverse()
+            entry = _CachedPath(tuple(states), tuple(cost - costs[0] for cost in costs))
+            if self._reuse_subpaths:
+                goal_state = key[1]
+                for position, state in enumerate(entry.states[1:], 1):
+                    self._suffixes[(state, goal_state)] = (key, position)
+
+        self._entries[key] = entry
+        while len(self._entries) > self._capacity:
+            self._evict(*self._entries.popitem(last=False))
+
+    def _evict(self, key: tuple[Hashable, Hashable, int], entry: _CachedPath) -> None:
+        if entry.states is None or not self._reuse_subpaths:
+            return
+        goal_state = key[1]
+        for state in entry.states[1:]:
+            suffix = self._suffixes.get((state, goal_state))
+            if suffix is not None and suffix[0] == key:
+                del self._suffixes[(state, goal_state)]
+
+    @staticmethod
+    def _to_node(entry: _CachedPath, position: int, problem: Problem) -> Node | None:
+        if entry.states is None:
+            return None
+        heuristic = problem.heuristic
+        initial_state = problem.initial_node.state
+        offset = problem.initial_node.cost - heuristic(initial_state) - entry.costs[position]
+        node = None
+        for state, cost in zip(entry.states[position:], entry.costs[position:]):
+            node = Node(state=state, cost=offset + cost + heuristic(state), parent=node)
+        return node
+
+
+if __name__ == '__main__':
+    graph = grid_graph(60, 60, seed=0)
+    nodes = graph.nodes()
+    rng = random.Random(0)
+    goals = rng.sample(nodes, 8)
+    pairs = [(rng.choice(nodes), rng.choice(goals)) for _ in range(40)]
+    queries = [rng.choice(pairs) for _ in range(400)]
+
+    def make_problem(initial_state: str, goal_state: str) -> Problem:
+        heuristics = ManhattanHeuristics(goal_state)
+        return Problem(initial_node=Node(state=initial_state, cost=heuristics[initial_state]),
+                       goal_state=goal_state, graph=graph, heuristics=heuristics)
+
+    start = time.perf_counter()
+    expected = [a_star(make_problem(*query)).cost for query in queries]
+    uncached_time = time.perf_counter() - start
+
+    cache = PathCache(capacity=32)
+    start = time.perf_counter()
+    costs = [cache.a_star(make_problem(*query)).cost for query in queries]
+    cached_time = time.perf_counter() - start
+    if costs != expected:
+        raise AssertionError('path cache and a_star disagree!')
+
+    print(f'uncached: {uncached_time:.3f}s, cached: {cached_time:.3f}s')
+    print(f'hits={cache.hits} subpath_hits={cache.subpath_hits} misses={cache.misses} '
+          f'hit_rate={cache.hit_rate():.2f}')
+
+    a_state, b_state = graph.edges()[0]
+    graph.update_edge_cost(a_state, b_state, graph.edge_cost(a_state, b_state) + 1)
+    cache.a_star(make_problem(*queries[0]))
+    print(f'after update_edge_cost: invalidations={cache.invalidations} cached paths={len(cache)}')
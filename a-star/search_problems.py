@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import random
+
+from a_star import ImplicitProblem, Node, Problem, a_star_search
+from graph import Graph
+
+
+def grid_graph(rows: int, cols: int, max_cost: int = 9, seed: int | None = None) -> Graph[str]:
+    rng = random.Random(seed)
+    graph = Graph[str]()
+    for i in range(rows):
+        for j in range(cols):
+            graph.add_node(f'{i},{j}')
+
+    for i in range(rows):
+        for j in range(cols):
+            if i + 1 < rows:
+                graph.add_bidirectional_edge(f'{i},{j}', f'{i + 1},{j}', cost=rng.randint(1, max_cost))
+            if j + 1 < cols:
+                graph.add_bidirectional_edge(f'{i},{j}', f'{i},{j + 1}', cost=rng.randint(1, max_cost))
+    return graph
+
+
+class ManhattanHeuristics:
+
+    def __init__(self, goal_state: str):
+        goal_i, goal_j = goal_state.split(',')
+        self._goal_i = int(goal_i)
+        self._goal_j = int(goal_j)
+
+    def __getitem__(self, state: str) -> int:
+        i, j = state.split(',')
+        return abs(int(i) - self._goal_i) + abs(int(j) - self._goal_j)
+
+
+def grid_problem(rows: int,
+                 cols: int,
+                 initial_state: str | None = None,
+                 goal_state: str | None = None,
+                 max_cost: int = 9,
+                 seed: int | None = None) -> Problem:
+    graph = grid_graph(rows, cols, max_cost=max_cost, seed=seed)
+    initial_state = initial_state or '0,0'
+    goal_state = goal_state or f'{rows - 1},{cols - 1}'
+    heuristics = ManhattanHeuristics(goal_state)
+    initial_node = Node(state=initial_state, cost=heuristics[initial_state])
+    return Problem(initial_node=initial_node, goal_state=goal_state, graph=graph, heuristics=heuristics)
+
+
+def sliding_puzzle_problem(tiles: tuple[int, ...], width: int) -> ImplicitProblem:
+    if sorted(tiles) != list(range(len(tiles))) or len(tiles) % width != 0:
+        raise ValueError("tiles must be a permutation of 0..n-1 laid out in rows of the given width!")
+    goal_state = tuple(range(1, len(tiles))) + (0,)
+    goal_positions = {tile: divmod(position, width) for position, tile in enumerate(goal_state)}
+    height = len(tiles) // width
+
+    def successors(state: tuple[int, ...]) -> list[tuple[tuple[int, ...], int]]:
+        blank = state.index(0)
+        row, col = divmod(blank, width)
+        result = []
+        for adj_row, adj_col in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+            if 0 <= adj_row < height and 0 <= adj_col < width:
+                adj_blank = adj_row * width + adj_col
+                adj_state = list(state)
+                adj_state[blank], adj_state[adj_blank] = adj_state[adj_blank], 0
+                result.append((tuple(adj_state), 1))
+        return result
+
+    def heuristic(state: tuple[int, ...]) -> int:
+        distance = 0
+        for position, tile in enumerate(state):
+            if tile != 0:
+                row, col = divmod(position, width)
+                goal_row, goal_col = goal_positions[tile]
+                distance += abs(row - goal_row) + abs(col - goal_col)
+        return distance
+
+    initial_node = Node(state=tuple(tiles), cost=heuristic(tuple(tiles)))
+    return ImplicitProblem(initial_node=initial_node,
+                           goal_state=goal_state,
+                           successor_function=successors,
+                           heuristic_function=heuristic)
+
+
+if __name__ == '__main__':
+    puzzle = sliding_puzzle_problem((8, 6, 7, 2, 5, 4, 3, 0, 1), width=3)
+    node, stats = a_star_search(puzzle)
+    print(f'8-puzzle solved in {node.cost} moves')
+    print(stats)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import os
+import pickle
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, Iterator
+
+from a_star import Node, Problem, a_star
+from graph import CompactGraph, Graph
+from search_problems import grid_graph
+
+
+@dataclass(slots=True, frozen=True)
+class QueryResult:
+    initial_state: str
+    goal_state: str
+    cost: float | None
+    path: list[str] | None
+
+
+class ZeroHeuristics:
+
+    def __getitem__(self, state: str) -> int:
+        return 0
+
+
+def solve_many(graph: Graph[str] | CompactGraph[str],
+               queries: Iterable[tuple[str, str]],
+               workers: int | None = None,
+               chunksize: int = 16) -> Iterator[QueryResult]:
+    compact_graph = graph.freeze() if isinstance(graph, Graph) else graph
+    workers = workers or os.cpu_count()
+
+    mapped_path = compact_graph.path()
+    if mapped_path is not None:
+        with Pool(workers, initializer=_init_mapped_worker, initargs=(mapped_path,)) as pool:
+            yield from pool.imap_unordered(_solve, queries, chunksize)
+        return
+
+    blocks = []
+    try:
+        layout = []
+        for buffer in compact_graph.buffers():
+            view = memoryview(buffer)
+            block = SharedMemory(create=True, size=max(1, view.nbytes))
+            blocks.append(block)
+            block.buf[:view.nbytes] = view.cast('B')
+            layout.append((block.name, view.format, view.itemsize, len(view)))
+        node_table = pickle.dumps(compact_graph.nodes(), protocol=pickle.HIGHEST_PROTOCOL)
+        block = SharedMemory(create=True, size=len(node_table))
+        blocks.append(block)
+        block.buf[:len(node_table)] = node_table
+
+        with Pool(workers, initializer=_init_worker, initargs=(layout, block.name, len(node_table))) as pool:
+            yield from pool.imap_unordered(_solve, queries, chunksize)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+_worker_graph: CompactGraph[str] | None = None
+_worker_blocks: list[SharedMemory] = []
+
+
+def _init_worker(layout: list[tuple[str, str, int, int]], node_table_name: str, node_table_size: int) -> None:
+    global _worker_graph
+    buffers = []
+    for name, buffer_format, itemsize, length in layout:
+        block = SharedMemory(name=name)
+        _worker_blocks.append(block)
+        buffers.append(block.buf[:length * itemsize].cast(buffer_format))
+    node_table = SharedMemory(name=node_table_name)
+    nodes = pickle.loads(node_table.buf[:node_table_size])
+    node_table.close()
+    _worker_graph = CompactGraph(nodes, *buffers)
+
+
+def _init_mapped_worker(path: str) -> None:
+    global _worker_graph
+    _worker_graph = CompactGraph.load(path, mmap=True)
+
+
+def _solve(query: tuple[str, str]) -> QueryResult:
+    initial_state, goal_state = query
+    problem = Problem(initial_node=Node(state=initial_state),
+                      goal_state=goal_state,
+                      graph=_worker_graph,
+                      heuristics=ZeroHeuristics())
+    node = a_star(problem)
+    if node is None:
+        return QueryResult(initial_state, goal_state, None, None)
+
+    path = []
+    cost = node.cost
+    while node is not None:
+        path.append(node.state)
+        node = node.parent
+    path.reverse()
+    return QueryResult(initial_state, goal_state, cost, path)
+
+
+if __name__ == '__main__':
+    side = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    tot_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    graph = grid_graph(side, side, seed=0).freeze()
+    nodes = graph.nodes()
+    queries = [(nodes[i * 7919 % len(nodes)], nodes[i * 104729 % len(nodes)]) for i in range(tot_queries)]
+
+    for workers in (1, os.cpu_count()):
+        start = time.perf_counter()
+        results = list(solve_many(graph, queries, workers=workers))
+        print(f'workers={workers}: {len(results)} queries in {time.perf_counter() - start:.2f}s')
+
+    expected = {(result.initial_state, result.goal_state): result.cost for result in results}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'grid.graph')
+        graph.save(path)
+        for mmap in (True, False):
+            start = time.perf_counter()
+            results = list(solve_many(Graph.load(path, mmap=mmap), queries))
+            if any(result.cost != expected[(result.initial_state, result.goal_state)] for result in results):
+                raise AssertionError('solve_many disagrees on a loaded graph!')
+            print(f'loaded mmap={mmap}: {len(results)} queries in {time.perf_counter() - start:.2f}s')
@@ -1,37 +1,75 @@
+from __future__ import annotations
+
 from queue import Queue
 
-from csp.csp_components import CSP, Variable
+from csp.csp_components import CSP, GlobalConstraint, Variable
 
 
-def ac_3(csp: CSP[Variable[any]], queue: Queue = Queue()) -> bool:
+def ac_3(csp: CSP[Variable[any]], queue: Queue | None = None) -> bool:
 
     def revise(x: Variable[any], y: Variable[any]) -> bool:
-        consistent_values = []
-        constraint = csp.edge_constraint(x, y)
-        for i in x.domain:
-            for j in y.domain:
-                if constraint(i, j):
-                    consistent_values.append(i)
-                    break
-        revised = len(x.domain) != len(consistent_values)
-        x.domain = consistent_values
-        return revised
+        supports = csp.edge_supports(x, y)
+        if supports is None:
+            constraint = csp.edge_constraint(x, y)
+            y_domain = y.domain
+            inconsistent_values = [i for i in x.domain if not any(constraint(i, j) for j in y_domain)]
+        else:
+            residues = csp.edge_residues(x, y)
+            y_mask = csp.domain_mask(y)
+            inconsistent_values = []
+            for i in x.domain:
+                if residues.get(i, 0) & y_mask:
+                    continue
+                i_supports = supports[i] & y_mask
+                if i_supports:
+                    residues[i] = i_supports & -i_supports
+                else:
+                    inconsistent_values.append(i)
+        for i in inconsistent_values:
+            csp.prune(x, i, y)
+        return len(inconsistent_values) > 0
+
+    scheduled_constraints: set[GlobalConstraint[any]] = set()
+
+    def schedule_constraint(constraint: GlobalConstraint[any]) -> None:
+        if constraint not in scheduled_constraints:
+            scheduled_constraints.add(constraint)
+            queue.put_nowait(constraint)
 
+    if queue is None:
+        queue = Queue()
     if queue.empty():
         for edge in csp.edges():
             queue.put_nowait(edge)
+        for constraint in csp.global_constraints():
+            schedule_constraint(constraint)
 
     while not queue.empty():
-        (xi, xj) = queue.get_nowait()
+        item = queue.get_nowait()
+        if isinstance(item, GlobalConstraint):
+            scheduled_constraints.discard(item)
+            changed_vars = item.propagate(csp)
+            if changed_vars is None:
+                return False
+            for xi in changed_vars:
+                for xk in csp.adj(xi):
+                    queue.put_nowait((xk, xi))
+                for constraint in csp.global_constraints(xi):
+                    if constraint is not item:
+                        schedule_constraint(constraint)
+            continue
+
+        (xi, xj) = item
         if revise(xi, xj):
             if len(xi.domain) == 0:
                 return False
             for xk in csp.adj(xi):
                 queue.put_nowait((xk, xi))
+            for constraint in csp.global_constraints(xi):
+                schedule_constraint(constraint)
 
     return True
 
-
 if __name__ == '__main__':
     csp_problem = CSP[Variable[int]]()
 
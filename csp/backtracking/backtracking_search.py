@@ -1,14 +1,18 @@
-from csp_components import CSP, Variable, Assignment
-from csp_problems import knights_chessboard_problem
+import time
+from dataclasses import dataclass
 
-from infereces import Inference, ArcConsistencyInference, ForwardChecking, MaintainingArcConsistency
-from value_selectors import (
+from csp.csp_components import CSP, Variable, Assignment
+from csp.csp_problems import knights_chessboard_problem, map_colouring_problem
+
+from csp.backtracking.infereces import Inference, ArcConsistencyInference, ForwardChecking, MaintainingArcConsistency
+from csp.backtracking.nogoods import NogoodStore
+from csp.backtracking.value_selectors import (
     ValueOrderHeuristic,
     LeastConstrainingValueOrderingHeuristic,
     StaticValueOrderingHeuristic,
     RandomValueOrderingHeuristic
 )
-from var_selectors import (
+from csp.backtracking.var_selectors import (
     VarOrderingHeuristic,
     MRVVarOrderingHeuristic,
     StaticVarOrderingHeuristic,
@@ -17,43 +21,141 @@ from var_selectors import (
 )
 
 
+@dataclass(slots=True)
+class BacktrackingStats:
+    nodes: int = 0
+    backtracks: int = 0
+    backjumps: int = 0
+    nogoods_learned: int = 0
+    nogood_prunes: int = 0
+    restarts: int = 0
+    cutoff: bool = False
+    wall_time: float = 0.0
+
+
+_CUTOFF = object()
+
+
 def backtracking_search(csp: CSP[Variable[any]],
                         inference: Inference,
                         var_ordering_heuristic: VarOrderingHeuristic,
-                        value_ordering_heuristic: ValueOrderHeuristic) -> Assignment[Variable[any]] | bool:
-
-    def backtrack(assignment: Assignment) -> dict[Variable[any], any] | bool:
-        print(f'- {assignment}')
+                        value_ordering_heuristic: ValueOrderHeuristic,
+                        verbose: bool = True) -> Assignment[Variable[any]] | bool:
+    assignment, _ = backtracking_search_stats(csp, inference, var_ordering_heuristic, value_ordering_heuristic,
+                                              verbose=verbose)
+    return assignment
+
+
+def backtracking_search_stats(csp: CSP[Variable[any]],
+                              inference: Inference,
+                              var_ordering_heuristic: VarOrderingHeuristic,
+                              value_ordering_heuristic: ValueOrderHeuristic,
+                              backjumping: bool = False,
+                              nogoods: NogoodStore | None = None,
+                              max_backtracks: int | None = None,
+                              verbose: bool = False) -> tuple[Assignment[Variable[any]] | bool, BacktrackingStats]:
+    if nogoods is not None and not backjumping:
+        raise ValueError("Nogood learning requires backjumping!")
+    start_time = time.perf_counter()
+    stats = BacktrackingStats()
+    base_mark = csp.trail_mark()
+    assigned_vars: list[Variable[any]] = []
+
+    def explain(var: Variable[any], assignment: Assignment) -> set[Variable[any]]:
+        causes = csp.prune_causes(base_mark)
+        culprits = {var} if var in assignment else set()
+        visited, stack = {var}, [var]
+        while stack:
+            for cause in causes.get(stack.pop(), ()):
+                if cause is None:
+                    return set(assigned_vars)
+                if cause in assignment:
+                    culprits.add(cause)
+                elif cause not in visited:
+                    visited.add(cause)
+                    stack.append(cause)
+        return culprits
+
+    def backtrack(assignment: Assignment) -> Assignment | set[Variable[any]] | object | None:
+        if verbose:
+            print(f'- {assignment}')
+        stats.nodes += 1
 
         if len(assignment) == len(csp):
             return assignment
 
         var = var_ordering_heuristic(csp, assignment)
         values = value_ordering_heuristic(csp, var, assignment)
+        conflict_set: set[Variable[any]] = set()
         for step, value in enumerate(start=1, iterable=values):
-            if assignment.is_consistent_value(var, value):
-                assignment.set(var, value)
-                backup_var_domains = csp.backup_var_domains()
-
-                inferences = inference(csp, var, assignment)
-                if inferences is not False:
-                    result = backtrack(assignment)
-                    if result is not False:
-                        return assignment
-                    csp.restore_var_domains(backup_var_domains)
-
-                assignment.remove(var)
-
+            conflicting_var = assignment.conflicting_var(var, value)
+            if conflicting_var is not None:
+                conflict_set.add(conflicting_var)
+                continue
+            if nogoods is not None:
+                nogood = nogoods.violated(var, value, assignment)
+                if nogood is not None:
+                    stats.nogood_prunes += 1
+                    conflict_set.update(nogood_var for nogood_var, _ in nogood if nogood_var != var)
+                    continue
+
+            assignment.set(var, value)
+            assigned_vars.append(var)
+            trail_mark = csp.trail_mark()
+
+            inferences = inference(csp, var, assignment)
+            if inferences is not False:
+                result = backtrack(assignment)
+                if isinstance(result, Assignment):
+                    return assignment
+                if result is _CUTOFF or (result is not None and var not in result):
+                    csp.undo(trail_mark)
+                    assigned_vars.pop()
+                    assignment.remove(var)
+                    if result is not _CUTOFF:
+                        stats.backjumps += 1
+                    var_ordering_heuristic.backtrack()
+                    return result
+                if result is not None:
+                    conflict_set |= result
+            elif backjumping:
+                wipeout = csp.last_wipeout()
+                if wipeout is not None and len(wipeout[0].domain) == 0:
+                    conflict_set |= explain(wipeout[0], assignment)
+                else:
+                    conflict_set.update(assigned_vars)
+
+            csp.undo(trail_mark)
+            assigned_vars.pop()
+            assignment.remove(var)
+
+        stats.backtracks += 1
         var_ordering_heuristic.backtrack()
-        return False
+        if backjumping:
+            conflict_set |= explain(var, assignment)
+            conflict_set.discard(var)
+            if nogoods is not None and conflict_set:
+                nogoods.add(frozenset((conflict_var, assignment.value(conflict_var)) for conflict_var in conflict_set))
+                stats.nogoods_learned += 1
+        if max_backtracks is not None and stats.backtracks >= max_backtracks and assigned_vars \
+                and (conflict_set or not backjumping):
+            stats.cutoff = True
+            return _CUTOFF
+        return conflict_set if backjumping else None
 
     empty_assignment = Assignment(csp, assignment={})
-    return backtrack(empty_assignment)
+    try:
+        solution = backtrack(empty_assignment)
+    finally:
+        var_ordering_heuristic.close()
+    stats.wall_time = time.perf_counter() - start_time
+    return (solution if isinstance(solution, Assignment) else False), stats
 
 
 if __name__ == '__main__':
     # Choose a CSP problem
     csp_problem = knights_chessboard_problem(tot_knights=10, dim_chessboard=4)
+    csp_problem.compile_constraints()
 
     # Inferences
     arc_consistency_inference = ArcConsistencyInference()
@@ -80,3 +182,23 @@ if __name__ == '__main__':
     )
 
     print(f'Solution: {solution}')
+
+    # Conflict-directed backjumping: an unsatisfiable clique placed after an independent map colouring
+    for backjumping, nogood_store in ((False, None), (True, None), (True, NogoodStore(capacity=256))):
+        structured_problem = map_colouring_problem()
+        clique = [Variable[str](domain=['red', 'green', 'blue'], name=f'K{k}') for k in range(4)]
+        for var in clique:
+            structured_problem.add_node(var)
+        for k, var in enumerate(clique):
+            for other_var in clique[k + 1:]:
+                structured_problem.add_bidirectional_edge(var, other_var, constraint=lambda a, b: a != b)
+
+        result, stats = backtracking_search_stats(
+            csp=structured_problem,
+            inference=ForwardChecking(),
+            var_ordering_heuristic=StaticVarOrderingHeuristic(),
+            value_ordering_heuristic=StaticValueOrderingHeuristic(),
+            backjumping=backjumping,
+            nogoods=nogood_store
+        )
+        print(f'backjumping={backjumping} nogoods={nogood_store is not None}: {result} {stats}')
@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from typing import Iterator, Sequence
+
+from csp.csp_components import CSP, Variable, Assignment
+from csp.csp_problems import knights_chessboard_problem, map_colouring_problem
+from csp.backtracking.infereces import Inference, ForwardChecking, MaintainingArcConsistency
+from csp.backtracking.value_selectors import ValueOrderHeuristic, StaticValueOrderingHeuristic
+from csp.backtracking.var_selectors import VarOrderingHeuristic, IncrementalMRVVarOrderingHeuristic
+
+
+@dataclass(slots=True, frozen=True)
+class Solution(Mapping):
+    positions: dict[Variable[any], int] = field(compare=False, repr=False)
+    values: tuple[any, ...]
+
+    def __getitem__(self, var: Variable[any]) -> any:
+        return self.values[self.positions[var]]
+
+    def __iter__(self) -> Iterator[Variable[any]]:
+        return iter(self.positions)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __str__(self) -> str:
+        return {var.__str__(): value.__str__() for var, value in zip(self.positions, self.values)}.__str__()
+
+
+def iter_solutions(csp: CSP[Variable[any]],
+                   inference: Inference,
+                   var_ordering_heuristic: VarOrderingHeuristic,
+                   value_ordering_heuristic: ValueOrderHeuristic) -> Iterator[Solution]:
+    variables = csp.nodes()
+    positions = {var: position for position, var in enumerate(variables)}
+    for assignment in _search(csp, inference, var_ordering_heuristic, value_ordering_heuristic):
+        yield Solution(positions, tuple(assignment.value(var) for var in variables))
+
+
+def count_solutions(csp: CSP[Variable[any]],
+                    inference: Inference,
+                    var_ordering_heuristic: VarOrderingHeuristic,
+                    value_ordering_heuristic: ValueOrderHeuristic,
+                    split_depth: int = 0,
+                    workers: int | None = None) -> int:
+    if split_depth <= 0 or workers == 1:
+        return sum(1 for _ in _search(csp, inference, var_ordering_heuristic, value_ordering_heuristic))
+
+    positions = {var: position for position, var in enumerate(csp.nodes())}
+    prefixes = [tuple((positions[var], assignment.value(var)) for var in assignment)
+                for assignment in _search(csp, inference, var_ordering_heuristic, value_ordering_heuristic,
+                                          max_depth=split_depth)]
+    workers = workers or os.cpu_count()
+    context = get_context('fork')
+    with context.Pool(workers, initializer=_init_worker,
+                      initargs=(csp, inference, var_ordering_heuristic, value_ordering_heuristic)) as pool:
+        return sum(pool.imap_unordered(_count_subtree, prefixes, chunksize=max(1, len(prefixes) // (4 * workers))))
+
+
+def _search(csp: CSP[Variable[any]],
+            inference: Inference,
+            var_ordering_heuristic: VarOrderingHeuristic,
+            value_ordering_heuristic: ValueOrderHeuristic,
+            prefix: Sequence[tuple[int, any]] = (),
+            max_depth: int | None = None) -> Iterator[Assignment[Variable[any]]]:
+    variables = csp.nodes()
+    assignment = Assignment(csp, assignment={})
+    base_mark = csp.trail_mark()
+    stack: list[tuple[Variable[any], Iterator[any], int]] = []
+    descend = True
+    try:
+        while True:
+            if descend:
+                depth = len(stack)
+                if len(assignment) == len(csp) or depth == max_depth:
+                    yield assignment
+                else:
+                    var = var_ordering_heuristic(csp, assignment)
+                    if depth < len(prefix):
+                        position, value = prefix[depth]
+                        if variables[position] is not var:
+                            raise ValueError("Splitting the search needs a deterministic variable ordering!")
+                        values = iter((value,))
+                    else:
+                        values = iter(value_ordering_heuristic(csp, var, assignment))
+                    stack.append((var, values, csp.trail_mark()))
+            if not stack:
+                return
+
+            var, values, trail_mark = stack[-1]
+            if var in assignment:
+                csp.undo(trail_mark)
+                assignment.remove(var)
+            descend = False
+            for value in values:
+                if assignment.conflicting_var(var, value) is not None:
+                    continue
+                assignment.set(var, value)
+                if inference(csp, var, assignment) is not False:
+                    descend = True
+                    break
+                csp.undo(trail_mark)
+                assignment.remove(var)
+            if not descend:
+                stack.pop()
+                var_ordering_heuristic.backtrack()
+    finally:
+        while stack:
+            var, _, trail_mark = stack.pop()
+            if var in assignment:
+                csp.undo(trail_mark)
+                assignment.remove(var)
+            var_ordering_heuristic.backtrack()
+        var_ordering_heuristic.close()
+        csp.undo(base_mark)
+
+
+_worker_csp: CSP[Variable[any]] | None = None
+_worker_search: tuple[Inference, VarOrderingHeuristic, ValueOrderHeuristic] | None = None
+
+
+def _init_worker(csp: CSP[Variable[any]],
+                 inference: Inference,
+                 var_ordering_heuristic: VarOrderingHeuristic,
+                 value_ordering_heuristic: ValueOrderHeuristic) -> None:
+    global _worker_csp, _worker_search
+    _worker_csp = csp
+    _worker_search = (inference, var_ordering_heuristic, value_ordering_heuristic)
+
+
+def _count_subtree(prefix: tuple[tuple[int, any], ...]) -> int:
+    return sum(1 for _ in _search(_worker_csp, *_worker_search, prefix=prefix))
+
+
+if __name__ == '__main__':
+    map_problem = map_colouring_problem()
+    for solution in iter_solutions(map_problem, ForwardChecking(), IncrementalMRVVarOrderingHeuristic(),
+                                   StaticValueOrderingHeuristic()):
+        print(f'- {solution}')
+        break
+
+    tot_knights = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    dim_chessboard = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    for split_depth, workers in ((0, 1), (2, os.cpu_count())):
+        csp_problem = knights_chessboard_problem(tot_knights=tot_knights, dim_chessboard=dim_chessboard,
+                                                 all_different=True)
+        csp_problem.compile_constraints()
+        start = time.perf_counter()
+        tot_solutions = count_solutions(csp_problem, MaintainingArcConsistency(),
+                                        IncrementalMRVVarOrderingHeuristic(), StaticValueOrderingHeuristic(),
+                                        split_depth=split_depth, workers=workers)
+        print(f'split_depth={split_depth} workers={workers}: {tot_solutions} solutions '
+              f'in {time.perf_counter() - start:.2f}s')
@@ -1,5 +1,4 @@
 from abc import ABCMeta, abstractmethod
-from copy import deepcopy
 from queue import Queue
 
 from csp.ac_3 import ac_3
@@ -29,14 +28,22 @@ class ForwardChecking(Inference):
         for adj in csp.adj(var):
             if adj in assignment:
                 continue
-            constraint_adj_to_var = csp.edge_constraint(adj, var)
-
-            new_adj_domain = deepcopy(adj.domain)
-            for adj_value in adj.domain:
-                if not constraint_adj_to_var(adj_value, var_value):
-                    new_adj_domain.remove(adj_value)
-                    if len(new_adj_domain) == 0:
-                        return False
+            supports = csp.edge_supports(adj, var)
+            if supports is None:
+                constraint_adj_to_var = csp.edge_constraint(adj, var)
+                inconsistent_values = [adj_value for adj_value in adj.domain
+                                       if not constraint_adj_to_var(adj_value, var_value)]
+            else:
+                var_bit = csp.value_bits(var)[var_value]
+                inconsistent_values = [adj_value for adj_value in adj.domain if not supports[adj_value] & var_bit]
+            for adj_value in inconsistent_values:
+                csp.prune(adj, adj_value, var)
+            if len(adj.domain) == 0:
+                return False
+
+        for constraint in csp.global_constraints(var):
+            if constraint.propagate(csp) is None:
+                return False
 
         return True
 
@@ -51,5 +58,7 @@ class MaintainingArcConsistency(Inference):
         for adj in csp.adj(var):
             if adj not in assignment:
                 queue.put_nowait((adj, var))
+        for constraint in csp.global_constraints(var):
+            queue.put_nowait(constraint)
 
         return ac_3(csp, queue)
@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+from csp.csp_components import Variable, Assignment
+
+Nogood = frozenset[tuple[Variable[any], any]]
+
+
+class NogoodStore:
+
+    def __init__(self, capacity: int = 1024):
+        if capacity < 1:
+            raise ValueError("NogoodStore needs room for at least one nogood!")
+        self._capacity = capacity
+        self._nogoods: OrderedDict[Nogood, None] = OrderedDict()
+        self._watches: dict[tuple[Variable[any], any], set[Nogood]] = {}
+        self.evictions = 0
+
+    def add(self, nogood: Nogood) -> None:
+        if nogood in self._nogoods:
+            self._nogoods.move_to_end(nogood)
+            return
+
+        self._nogoods[nogood] = None
+        for literal in nogood:
+            self._watches.setdefault(literal, set()).add(nogood)
+        while len(self._nogoods) > self._capacity:
+            evicted, _ = self._nogoods.popitem(last=False)
+            for literal in evicted:
+                watches = self._watches[literal]
+                watches.discard(evicted)
+                if not watches:
+                    del self._watches[literal]
+            self.evictions += 1
+
+    def violated(self, var: Variable[any], value: any, assignment: Assignment[Variable[any]]) -> Nogood | None:
+        for nogood in self._watches.get((var, value), ()):
+            if all(other_var == var or (other_var in assignment and assignment.value(other_var) == other_value)
+                   for other_var, other_value in nogood):
+                self._nogoods.move_to_end(nogood)
+                return nogood
+        return None
+
+    def __len__(self) -> int:
+        return len(self._nogoods)
+
+    def __contains__(self, nogood: Nogood) -> bool:
+        return nogood in self._nogoods
@@ -0,0 +1,102 @@
+import os
+import time
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import Sequence
+
+from csp.csp_components import CSP, Variable, Assignment
+from csp.csp_problems import knights_chessboard_problem
+from csp.backtracking.backtracking_search import backtracking_search
+from csp.backtracking.infereces import Inference, ForwardChecking, MaintainingArcConsistency
+from csp.backtracking.value_selectors import (
+    ValueOrderHeuristic,
+    LeastConstrainingValueOrderingHeuristic,
+    StaticValueOrderingHeuristic
+)
+from csp.backtracking.var_selectors import (
+    VarOrderingHeuristic,
+    MRVVarOrderingHeuristic,
+    StaticVarOrderingHeuristic,
+    DegreeVarOrderingHeuristic
+)
+
+
+@dataclass(slots=True)
+class PortfolioConfig:
+    name: str
+    inference: Inference
+    var_ordering_heuristic: VarOrderingHeuristic
+    value_ordering_heuristic: ValueOrderHeuristic
+
+
+@dataclass(slots=True, frozen=True)
+class PortfolioResult:
+    assignment: Assignment[Variable[any]]
+    config: PortfolioConfig
+    config_index: int
+    wall_time: float
+
+
+def default_portfolio() -> list[PortfolioConfig]:
+    return [
+        PortfolioConfig('mrv+lcv+mac', MaintainingArcConsistency(), MRVVarOrderingHeuristic(),
+                        LeastConstrainingValueOrderingHeuristic()),
+        PortfolioConfig('degree+static+fc', ForwardChecking(), DegreeVarOrderingHeuristic(),
+                        StaticValueOrderingHeuristic()),
+        PortfolioConfig('mrv+static+fc', ForwardChecking(), MRVVarOrderingHeuristic(),
+                        StaticValueOrderingHeuristic()),
+        PortfolioConfig('static+static+mac', MaintainingArcConsistency(), StaticVarOrderingHeuristic(),
+                        StaticValueOrderingHeuristic()),
+    ]
+
+
+def portfolio_search(csp: CSP[Variable[any]],
+                     configs: Sequence[PortfolioConfig] | None = None,
+                     workers: int | None = None) -> PortfolioResult | bool:
+    configs = list(configs) if configs is not None else default_portfolio()
+    workers = workers or len(configs)
+    context = get_context('fork')
+    with context.Pool(workers, initializer=_init_worker, initargs=(csp, configs)) as pool:
+        for config_index, values, wall_time in pool.imap_unordered(_solve, range(len(configs))):
+            if values is not None:
+                assignment = Assignment(csp, dict(zip(csp.nodes(), values)))
+                return PortfolioResult(assignment, configs[config_index], config_index, wall_time)
+    return False
+
+
+_worker_csp: CSP[Variable[any]] | None = None
+_worker_configs: list[PortfolioConfig] = []
+
+
+def _init_worker(csp: CSP[Variable[any]], configs: list[PortfolioConfig]) -> None:
+    global _worker_csp, _worker_configs
+    _worker_csp = csp
+    _worker_configs = configs
+
+
+def _solve(config_index: int) -> tuple[int, list[any] | None, float]:
+    config = _worker_configs[config_index]
+    start = time.perf_counter()
+    assignment = backtracking_search(_worker_csp,
+                                     inference=config.inference,
+                                     var_ordering_heuristic=config.var_ordering_heuristic,
+                                     value_ordering_heuristic=config.value_ordering_heuristic,
+                                     verbose=False)
+    wall_time = time.perf_counter() - start
+    if assignment is False:
+        return config_index, None, wall_time
+    return config_index, [assignment.value(var) for var in _worker_csp.nodes()], wall_time
+
+
+if __name__ == '__main__':
+    csp_problem = knights_chessboard_problem(tot_knights=12, dim_chessboard=5)
+    csp_problem.compile_constraints()
+
+    start = time.perf_counter()
+    result = portfolio_search(csp_problem)
+    if result is False:
+        print('No solution')
+    else:
+        print(f'winner: {result.config.name} in {result.wall_time:.2f}s '
+              f'(portfolio {time.perf_counter() - start:.2f}s, {os.cpu_count()} cpus)')
+        print(f'Solution: {result.assignment}')
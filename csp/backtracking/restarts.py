@@ -0,0 +1,100 @@
+import time
+from abc import ABCMeta, abstractmethod
+from itertools import count
+from typing import Iterator
+
+from csp.csp_components import CSP, Variable, Assignment
+from csp.csp_problems import knights_chessboard_problem
+from csp.backtracking.backtracking_search import BacktrackingStats, backtracking_search_stats
+from csp.backtracking.infereces import Inference, MaintainingArcConsistency
+from csp.backtracking.nogoods import NogoodStore
+from csp.backtracking.value_selectors import ValueOrderHeuristic, RandomValueOrderingHeuristic
+from csp.backtracking.var_selectors import VarOrderingHeuristic, DomWdegVarOrderingHeuristic
+
+
+class RestartPolicy(metaclass=ABCMeta):
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[int]:
+        pass
+
+
+class LubyRestarts(RestartPolicy):
+
+    def __init__(self, scale: int = 32):
+        if scale <= 0:
+            raise ValueError("Luby restarts need a positive scale!")
+        self._scale = scale
+
+    def __iter__(self) -> Iterator[int]:
+        for i in count(1):
+            yield self._scale * self.luby(i)
+
+    @staticmethod
+    def luby(i: int) -> int:
+        while True:
+            k = i.bit_length()
+            if i == (1 << k) - 1:
+                return 1 << (k - 1)
+            i -= (1 << (k - 1)) - 1
+
+
+class GeometricRestarts(RestartPolicy):
+
+    def __init__(self, initial: int = 32, factor: float = 1.5):
+        if initial <= 0:
+            raise ValueError("Geometric restarts need a positive initial cutoff!")
+        if factor < 1:
+            raise ValueError("Geometric restarts need a factor of at least 1!")
+        self._initial = initial
+        self._factor = factor
+
+    def __iter__(self) -> Iterator[int]:
+        cutoff = float(self._initial)
+        while True:
+            yield int(cutoff)
+            cutoff *= self._factor
+
+
+def restarting_search(csp: CSP[Variable[any]],
+                      inference: Inference,
+                      var_ordering_heuristic: VarOrderingHeuristic,
+                      value_ordering_heuristic: ValueOrderHeuristic,
+                      restart_policy: RestartPolicy | None = None,
+                      max_restarts: int | None = None,
+                      backjumping: bool = False,
+                      nogoods: NogoodStore | None = None) -> tuple[Assignment[Variable[any]] | bool, BacktrackingStats]:
+    restart_policy = restart_policy or LubyRestarts()
+    start_time = time.perf_counter()
+    stats = BacktrackingStats()
+    for run, max_backtracks in enumerate(restart_policy):
+        if max_restarts is not None and run >= max_restarts:
+            max_backtracks = None
+        assignment, run_stats = backtracking_search_stats(csp, inference, var_ordering_heuristic,
+                                                          value_ordering_heuristic, backjumping=backjumping,
+                                                          nogoods=nogoods, max_backtracks=max_backtracks)
+        stats.nodes += run_stats.nodes
+        stats.backtracks += run_stats.backtracks
+        stats.backjumps += run_stats.backjumps
+        stats.nogoods_learned += run_stats.nogoods_learned
+        stats.nogood_prunes += run_stats.nogood_prunes
+        if not run_stats.cutoff:
+            stats.wall_time = time.perf_counter() - start_time
+            return assignment, stats
+        stats.restarts += 1
+    stats.wall_time = time.perf_counter() - start_time
+    return False, stats
+
+
+if __name__ == '__main__':
+    csp_problem = knights_chessboard_problem(tot_knights=16, dim_chessboard=6)
+    csp_problem.compile_constraints()
+
+    var_ordering = DomWdegVarOrderingHeuristic(seed=0)
+    solution, stats = restarting_search(csp_problem,
+                                        inference=MaintainingArcConsistency(),
+                                        var_ordering_heuristic=var_ordering,
+                                        value_ordering_heuristic=RandomValueOrderingHeuristic(),
+                                        restart_policy=LubyRestarts(scale=16))
+    print(f'Solution: {solution}')
+    print(f'{stats}, wipeouts={var_ordering.wipeouts}')
@@ -1,6 +1,5 @@
 from abc import ABCMeta, abstractmethod
-from csp_components import CSP, Variable
-import copy
+from csp.csp_components import CSP, Variable
 import random
 
 
@@ -35,6 +34,6 @@ class StaticValueOrderingHeuristic(ValueOrderHeuristic):
 class RandomValueOrderingHeuristic(ValueOrderHeuristic):
 
     def __call__(self, csp: CSP[Variable[any]], var: Variable[any], assignment: dict[Variable[any], any]) -> list[any]:
-        copy_var_domain = copy.deepcopy(var.domain)
+        copy_var_domain = list(var.domain)
         random.shuffle(copy_var_domain)
         return copy_var_domain
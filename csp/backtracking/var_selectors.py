@@ -1,6 +1,7 @@
 import copy
 from abc import ABCMeta, abstractmethod
-from csp_components import CSP, Variable, Assignment
+from heapq import heapify, heappop, heappush
+from csp.csp_components import CSP, Variable, Assignment
 import random
 
 
@@ -13,6 +14,9 @@ class VarOrderingHeuristic(metaclass=ABCMeta):
     def backtrack(self) -> None:
         pass
 
+    def close(self) -> None:
+        pass
+
 
 class MRVVarOrderingHeuristic(VarOrderingHeuristic):
 
@@ -48,6 +52,117 @@ class MRVVarOrderingHeuristic(VarOrderingHeuristic):
         return tot_legal_values
 
 
+class IncrementalMRVVarOrderingHeuristic(VarOrderingHeuristic):
+    REBUILD_FACTOR = 8
+
+    def __init__(self):
+        self._csp = None
+        self._degrees: dict[Variable[any], int] = {}
+        self._positions: dict[Variable[any], int] = {}
+        self._versions: dict[Variable[any], int] = {}
+        self._heap: list[tuple[int, int, int, int, Variable[any]]] = []
+        self._selected: list[Variable[any]] = []
+
+    def __call__(self, csp: CSP[Variable[any]], assignment: Assignment) -> Variable[any]:
+        if csp is not self._csp or len(assignment) == 0:
+            self._attach(csp)
+        elif len(self._heap) > self.REBUILD_FACTOR * len(self._versions):
+            self._rebuild(assignment)
+
+        heap = self._heap
+        versions = self._versions
+        while True:
+            _, _, _, version, var = heappop(heap)
+            if version == versions[var] and var not in assignment:
+                versions[var] += 1
+                self._selected.append(var)
+                return var
+
+    def backtrack(self) -> None:
+        if self._selected:
+            self._push(self._selected.pop())
+
+    def close(self) -> None:
+        if self._csp is not None:
+            self._csp.unsubscribe_domain_changes(self._push)
+            self._csp = None
+        self._heap = []
+        self._selected = []
+
+    def _attach(self, csp: CSP[Variable[any]]) -> None:
+        self.close()
+        self._csp = csp
+        variables = csp.nodes()
+        self._degrees = {var: len(csp.neighbors(var)) for var in variables}
+        self._positions = {var: position for position, var in enumerate(variables)}
+        self._versions = {var: 0 for var in variables}
+        self._heap = [(len(var.domain), -self._degrees[var], self._positions[var], 0, var) for var in variables]
+        heapify(self._heap)
+        self._selected = []
+        csp.subscribe_domain_changes(self._push)
+
+    def _rebuild(self, assignment: Assignment) -> None:
+        versions = self._versions
+        self._heap = [(len(var.domain), -self._degrees[var], self._positions[var], versions[var], var)
+                      for var in versions if var not in assignment]
+        heapify(self._heap)
+
+    def _push(self, var: Variable[any]) -> None:
+        version = self._versions[var] + 1
+        self._versions[var] = version
+        heappush(self._heap, (len(var.domain), -self._degrees[var], self._positions[var], version, var))
+
+
+class DomWdegVarOrderingHeuristic(VarOrderingHeuristic):
+
+    def __init__(self, seed: int | None = None):
+        self._rng = random.Random(seed)
+        self._csp = None
+        self._weighted_csp = None
+        self.weights: dict[frozenset[Variable[any]], int] = {}
+        self.wipeouts = 0
+
+    def __call__(self, csp: CSP[Variable[any]], assignment: Assignment) -> Variable[any]:
+        if csp is not self._csp:
+            self._attach(csp)
+
+        weights = self.weights
+        best_score, best_vars = None, []
+        for var in csp.nodes():
+            if var in assignment:
+                continue
+            weighted_degree = sum(weights.get(frozenset((var, adj)), 1)
+                                  for adj in csp.neighbors(var) if adj not in assignment)
+            score = len(var.domain) / weighted_degree if weighted_degree else float('inf')
+            if best_score is None or score < best_score:
+                best_score, best_vars = score, [var]
+            elif score == best_score:
+                best_vars.append(var)
+        return best_vars[0] if len(best_vars) == 1 else self._rng.choice(best_vars)
+
+    def close(self) -> None:
+        if self._csp is not None:
+            self._csp.unsubscribe_domain_changes(self._on_domain_change)
+            self._csp = None
+
+    def _attach(self, csp: CSP[Variable[any]]) -> None:
+        self.close()
+        self._csp = csp
+        if csp is not self._weighted_csp:
+            self._weighted_csp = csp
+            self.weights = {}
+        csp.subscribe_domain_changes(self._on_domain_change)
+
+    def _on_domain_change(self, var: Variable[any]) -> None:
+        if len(var.domain) != 0:
+            return
+        wiped_var, cause = self._csp.last_wipeout()
+        if wiped_var is var and cause is not None:
+            key = frozenset((var, cause))
+            self.weights[key] = self.weights.get(key, 1) + 1
+            self.wipeouts += 1
+
+
 class StaticVarOrderingHeuristic(VarOrderingHeuristic):
 
     def __init__(self):
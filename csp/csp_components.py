@@ -2,26 +2,95 @@ from __future__ import annotations
 
 import copy
 import uuid
+from abc import ABCMeta, abstractmethod
 from graph import Graph
 from dataclasses import dataclass, field
-from typing import TypeVar, Generic, Callable
+from itertools import islice
+from typing import TypeVar, Generic, Callable, Iterator, Sequence
 from uuid import uuid4
 
 D = TypeVar("D")
 
 
+class BitsetDomain(Generic[D]):
+    __slots__ = ('values', 'bits', 'mask')
+
+    def __init__(self, values: Sequence[D]):
+        self.values: tuple[D, ...] = tuple(values)
+        self.bits: dict[D, int] = {value: 1 << index for index, value in enumerate(self.values)}
+        if len(self.bits) != len(self.values):
+            raise ValueError("Bitset domain values must be distinct!")
+        self.mask = (1 << len(self.values)) - 1
+
+    def with_mask(self, mask: int) -> BitsetDomain[D]:
+        domain = object.__new__(BitsetDomain)
+        domain.values = self.values
+        domain.bits = self.bits
+        domain.mask = mask
+        return domain
+
+    def remove(self, value: D) -> None:
+        bit = self.bits.get(value, 0)
+        if not self.mask & bit:
+            raise ValueError(f"{value} is not in the domain!")
+        self.mask &= ~bit
+
+    def add(self, value: D) -> None:
+        self.mask |= self.bits[value]
+
+    def copy(self) -> BitsetDomain[D]:
+        return self.with_mask(self.mask)
+
+    def __copy__(self) -> BitsetDomain[D]:
+        return self.copy()
+
+    def __deepcopy__(self, memo: dict) -> BitsetDomain[D]:
+        return self.copy()
+
+    def __iter__(self) -> Iterator[D]:
+        values = self.values
+        mask = self.mask
+        while mask:
+            low_bit = mask & -mask
+            yield values[low_bit.bit_length() - 1]
+            mask ^= low_bit
+
+    def __len__(self) -> int:
+        return self.mask.bit_count()
+
+    def __contains__(self, value: D) -> bool:
+        return bool(self.mask & self.bits.get(value, 0))
+
+    def __getitem__(self, index: int) -> D:
+        if index < 0:
+            index += len(self)
+        if index == 0 and self.mask:
+            return self.values[(self.mask & -self.mask).bit_length() - 1]
+        for value in islice(self, index, None):
+            return value
+        raise IndexError("Bitset domain index out of range!")
+
+    def __repr__(self) -> str:
+        return f'BitsetDomain({list(self)!r})'
+
+
 @dataclass(slots=True)
 class Variable(Generic[D]):
-    domain: list[D]
+    domain: list[D] | BitsetDomain[D]
     unary_constraints: list[Callable[[D], bool]] = field(default_factory=lambda: [])
     id: str = ''
     name: str = ''
     initial_domain: list[D] = field(default_factory=lambda: [])
+    bitset: bool = False
 
     def __post_init__(self) -> None:
         self.id = uuid4().__str__()
         self.name = self.id if not self.name else self.name
-        self.initial_domain = copy.deepcopy(self.domain)
+        self.initial_domain = copy.deepcopy(list(self.domain))
+        if self.bitset and not isinstance(self.domain, BitsetDomain):
+            self.domain = BitsetDomain(self.initial_domain)
+        elif not isinstance(self.domain, BitsetDomain):
+            self.domain = list(self.domain)
 
     def __hash__(self) -> int:
         return self.id.__hash__()
@@ -33,6 +102,162 @@ class Variable(Generic[D]):
         return self.id == other.id
 
 
+class GlobalConstraint(Generic[D], metaclass=ABCMeta):
+    variables: list[Variable[D]]
+
+    @abstractmethod
+    def propagate(self, csp: CSP[Variable[D]]) -> set[Variable[D]] | None:
+        pass
+
+    @abstractmethod
+    def conflicting_var(self, assignment: Assignment[D], var: Variable[D], value: D) -> Variable[D] | None:
+        pass
+
+    @abstractmethod
+    def decompose(self) -> list[tuple[Variable[D], Variable[D], Callable[[D, D], bool]]]:
+        pass
+
+
+class AllDifferent(GlobalConstraint[D]):
+
+    def __init__(self, variables: Sequence[Variable[D]]):
+        self.variables = list(variables)
+        self._matching: dict[Variable[D], D] = {}
+
+    def propagate(self, csp: CSP[Variable[D]]) -> set[Variable[D]] | None:
+        variables = self.variables
+        domains = [list(var.domain) for var in variables]
+        value_ids: dict[D, int] = {}
+        for domain in domains:
+            for value in domain:
+                value_ids.setdefault(value, len(value_ids))
+        values = list(value_ids)
+        tot_vars, tot_values = len(variables), len(values)
+        if tot_values < tot_vars:
+            return None
+
+        adj = [[value_ids[value] for value in domain] for domain in domains]
+        match_var, match_value = [-1] * tot_vars, [-1] * tot_values
+        for i, var in enumerate(variables):
+            value = self._matching.get(var)
+            if value in value_ids and value in domains[i] and match_value[value_ids[value]] == -1:
+                match_var[i] = value_ids[value]
+                match_value[value_ids[value]] = i
+        for i in range(tot_vars):
+            if match_var[i] == -1 and not _augment(i, adj, match_var, match_value):
+                return None
+        self._matching = {var: values[match_var[i]] for i, var in enumerate(variables)}
+
+        graph: list[list[int]] = [[tot_vars + match_var[i]] for i in range(tot_vars)]
+        graph += [[] for _ in range(tot_values)]
+        for i, var_adj in enumerate(adj):
+            for j in var_adj:
+                if j != match_var[i]:
+                    graph[tot_vars + j].append(i)
+
+        reachable = [False] * (tot_vars + tot_values)
+        stack = [tot_vars + j for j in range(tot_values) if match_value[j] == -1]
+        for node in stack:
+            reachable[node] = True
+        while stack:
+            for adj_node in graph[stack.pop()]:
+                if not reachable[adj_node]:
+                    reachable[adj_node] = True
+                    stack.append(adj_node)
+
+        components = _strongly_connected_components(graph)
+        changed_vars = set()
+        for i, var in enumerate(variables):
+            for j in adj[i]:
+                if j == match_var[i] or reachable[tot_vars + j] or components[i] == components[tot_vars + j]:
+                    continue
+                csp.prune(var, values[j])
+                changed_vars.add(var)
+        return changed_vars
+
+    def conflicting_var(self, assignment: Assignment[D], var: Variable[D], value: D) -> Variable[D] | None:
+        for other_var in self.variables:
+            if other_var != var and other_var in assignment and assignment.value(other_var) == value:
+                return other_var
+        return None
+
+    def decompose(self) -> list[tuple[Variable[D], Variable[D], Callable[[D, D], bool]]]:
+        def constraint(a, b): return a != b
+
+        return [(a_var, b_var, constraint) for k, a_var in enumerate(self.variables) for b_var in self.variables[k + 1:]]
+
+
+def _augment(root: int, adj: list[list[int]], match_var: list[int], match_value: list[int]) -> bool:
+    visited = set()
+    reached_from: dict[int, int] = {}
+    stack = [(root, iter(adj[root]))]
+    while stack:
+        i, values = stack[-1]
+        for j in values:
+            if j in visited:
+                continue
+            visited.add(j)
+            reached_from[j] = i
+            if match_value[j] == -1:
+                while True:
+                    i = reached_from[j]
+                    previous_j = match_var[i]
+                    match_var[i] = j
+                    match_value[j] = i
+                    if i == root:
+                        return True
+                    j = previous_j
+            stack.append((match_value[j], iter(adj[match_value[j]])))
+            break
+        else:
+            stack.pop()
+    return False
+
+
+def _strongly_connected_components(graph: list[list[int]]) -> list[int]:
+    tot_nodes = len(graph)
+    index, low_link, components = [-1] * tot_nodes, [0] * tot_nodes, [-1] * tot_nodes
+    on_stack = [False] * tot_nodes
+    stack: list[int] = []
+    counter = tot_components = 0
+    for root in range(tot_nodes):
+        if index[root] != -1:
+            continue
+        index[root] = low_link[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, 0)]
+        while work:
+            node, child_index = work[-1]
+            if child_index < len(graph[node]):
+                work[-1] = (node, child_index + 1)
+                child = graph[node][child_index]
+                if index[child] == -1:
+                    index[child] = low_link[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = True
+                    work.append((child, 0))
+                elif on_stack[child]:
+                    low_link[node] = min(low_link[node], index[child])
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low_link[parent] = min(low_link[parent], low_link[node])
+            if low_link[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    components[member] = tot_components
+                    if member == node:
+                        break
+                tot_components += 1
+    return components
+
+
 class Assignment(Generic[D]):
 
     def __init__(self, csp: CSP, assignment: dict[Variable[D], D]):
@@ -42,8 +267,7 @@ class Assignment(Generic[D]):
             self.set(var, value)
 
     def set(self, var: Variable[any], value: any) -> None:
-        backup_var_domain = copy.deepcopy(var.domain)
-        self._assignment[var] = (backup_var_domain, value)
+        self._assignment[var] = (var.domain, value)
         var.domain = [value]
 
     def remove(self, var: Variable[any]) -> None:
@@ -51,22 +275,42 @@ class Assignment(Generic[D]):
         del self._assignment[var]
         var.domain = backup_var_domain
 
+    def value(self, var: Variable[any]) -> any:
+        _, value = self._assignment[var]
+        return value
+
     def is_consistent_value(self, var: Variable[any], value: any) -> bool:
-        if len(self._assignment) == 0:
-            return True
+        return self.conflicting_var(var, value) is None
 
-        all_edges = self._csp.edges()
-        for assigned_var in self._assignment.keys():
-            if (var, assigned_var) not in all_edges:
+    def conflicting_var(self, var: Variable[any], value: any) -> Variable[any] | None:
+        assignment = self._assignment
+        if len(assignment) == 0:
+            return None
+
+        neighbors = self._csp.neighbors(var)
+        constraints = self._csp.constraints_from(var)
+        assigned_neighbors = neighbors if len(neighbors) <= len(assignment) else \
+            [assigned_var for assigned_var in assignment if assigned_var in neighbors]
+        for assigned_var in assigned_neighbors:
+            assigned = assignment.get(assigned_var)
+            if assigned is None:
                 continue
-            constraint_var_to_assigned_var = self._csp.edge_constraint(var, assigned_var)
+            _, assigned_var_value = assigned
+            constraint_var_to_assigned_var = constraints.get(assigned_var)
+            if constraint_var_to_assigned_var is not None \
+                    and not constraint_var_to_assigned_var(value, assigned_var_value):
+                return assigned_var
             constraint_assigned_var_to_var = self._csp.edge_constraint(assigned_var, var)
-            _, assigned_var_value = self._assignment[assigned_var]
-            if not constraint_var_to_assigned_var(value, assigned_var_value) \
-                    or not constraint_assigned_var_to_var(assigned_var_value, value):
-                return False
+            if constraint_assigned_var_to_var is not None \
+                    and not constraint_assigned_var_to_var(assigned_var_value, value):
+                return assigned_var
 
-        return True
+        for constraint in self._csp.global_constraints(var):
+            assigned_var = constraint.conflicting_var(self, var, value)
+            if assigned_var is not None:
+                return assigned_var
+
+        return None
 
     def is_solution(self) -> bool:
         if len(self._assignment) != len(self._csp):
@@ -77,15 +321,18 @@ class Assignment(Generic[D]):
                 return False
 
             _, var_value = self._assignment[var]
-            for adj in self._csp.adj(var):
+            for adj, constraint_var_adj in self._csp.constraints_from(var).items():
                 if len(adj.domain) != 1:
                     return False
 
                 _, adj_value = self._assignment[adj]
-                constraint_var_adj = self._csp.edge_constraint(var, adj)
                 if not constraint_var_adj(var_value, adj_value):
                     return False
 
+            for constraint in self._csp.global_constraints(var):
+                if constraint.conflicting_var(self, var, var_value) is not None:
+                    return False
+
         return True
 
     def conflicted_variables(self) -> list[Variable[any]]:
@@ -95,17 +342,14 @@ class Assignment(Generic[D]):
         conflicted_variables = []
         for var in self._assignment:
             var_value = var.domain[0]
-            for adj in self._csp.adj(var):
-                constraint_var_adj = self._csp.edge_constraint(var, adj)
-
-                stop = False
-                for adj_value in adj.domain:
-                    if not constraint_var_adj(var_value, adj_value):
-                        conflicted_variables.append(var)
-                        stop = True
-                        break
-                if stop:
+            for adj, constraint_var_adj in self._csp.constraints_from(var).items():
+                if any(not constraint_var_adj(var_value, adj_value) for adj_value in adj.domain):
+                    conflicted_variables.append(var)
                     break
+            else:
+                if any(constraint.conflicting_var(self, var, var_value) is not None
+                       for constraint in self._csp.global_constraints(var)):
+                    conflicted_variables.append(var)
 
         return conflicted_variables
 
@@ -115,6 +359,9 @@ class Assignment(Generic[D]):
     def __contains__(self, variable: Variable[any]):
         return variable in self._assignment.keys()
 
+    def __iter__(self) -> Iterator[Variable[any]]:
+        return iter(self._assignment)
+
     def __str__(self) -> str:
         assigned_vars: dict[str, str] = {}
         for var, (backup_domain, assigned_value) in self._assignment.items():
@@ -124,6 +371,34 @@ class Assignment(Generic[D]):
 
 class CSP(Graph[Variable[D]]):
     ARCH_CONSTRAINT_KEY = 'constraint'
+    ARCH_SUPPORTS_KEY = 'supports'
+    ARCH_RESIDUES_KEY = 'residues'
+
+    def __init__(self):
+        super().__init__()
+        self._trail: list[tuple[Variable[D], list[D] | BitsetDomain[D], int, D, Variable[D] | None]] = []
+        self._wipeout: tuple[Variable[D], Variable[D] | None] | None = None
+        self._value_bits: dict[Variable[D], dict[D, int]] = {}
+        self._neighbors: dict[Variable[D], set[Variable[D]]] = {}
+        self._constraints: dict[Variable[D], dict[Variable[D], Callable[[D, D], bool]]] = {}
+        self._domain_listeners: list[Callable[[Variable[D]], None]] = []
+        self._global_constraints: list[GlobalConstraint[D]] = []
+        self._var_global_constraints: dict[Variable[D], list[GlobalConstraint[D]]] = {}
+
+    def add_node(self, var: Variable[D]) -> None:
+        super().add_node(var)
+        self._neighbors[var] = set()
+        self._constraints[var] = {}
+        self._var_global_constraints[var] = []
+
+    def add_global_constraint(self, constraint: GlobalConstraint[D]) -> None:
+        self._global_constraints.append(constraint)
+        for var in constraint.variables:
+            self._var_global_constraints[var].append(constraint)
+        self._version += 1
+
+    def global_constraints(self, var: Variable[D] | None = None) -> list[GlobalConstraint[D]]:
+        return self._global_constraints if var is None else self._var_global_constraints[var]
 
     def add_edge(self,
                  a_var: Variable[D],
@@ -133,6 +408,11 @@ class CSP(Graph[Variable[D]]):
         super().add_edge(a_var, b_var, cost)
         edge_info = self._edge_info[(a_var, b_var)]
         edge_info[self.ARCH_CONSTRAINT_KEY] = constraint
+        self._constraints[a_var][b_var] = constraint
+        self._neighbors[a_var].add(b_var)
+        self._neighbors[b_var].add(a_var)
+        edge_info.pop(self.ARCH_SUPPORTS_KEY, None)
+        edge_info.pop(self.ARCH_RESIDUES_KEY, None)
 
     def add_bidirectional_edge(self,
                                a_var: Variable[D],
@@ -143,18 +423,147 @@ class CSP(Graph[Variable[D]]):
         self.add_edge(b_var, a_var, cost, lambda b, a: constraint(a, b))
 
     def edge_constraint(self, a_var: Variable[D], b_var: Variable[D]) -> Callable[[D, D], bool] | None:
-        try:
-            edge_info = self._edge_info[(a_var, b_var)]
-        except KeyError:
-            return None
-        return edge_info[self.ARCH_CONSTRAINT_KEY]
-
-    def backup_var_domains(self) -> dict[Variable[D], list[D]]:
-        backup_var_domains = {}
-        for variable in self._adj.keys():
-            backup_var_domains[variable] = copy.deepcopy(variable.domain)
-        return backup_var_domains
+        constraints = self._constraints.get(a_var)
+        return None if constraints is None else constraints.get(b_var)
+
+    def neighbors(self, var: Variable[D]) -> set[Variable[D]]:
+        return self._neighbors[var]
+
+    def constraints_from(self, var: Variable[D]) -> dict[Variable[D], Callable[[D, D], bool]]:
+        return self._constraints[var]
+
+    def compile_constraints(self) -> None:
+        tables: dict[tuple[Callable[[D, D], bool], tuple[D, ...], tuple[D, ...]], dict[D, int]] = {}
+        for (a_var, b_var), edge_info in self._edge_info.items():
+            constraint = edge_info[self.ARCH_CONSTRAINT_KEY]
+            key = (constraint, tuple(a_var.initial_domain), tuple(b_var.initial_domain))
+            supports = tables.get(key)
+            if supports is None:
+                b_bits = self.value_bits(b_var)
+                supports = {}
+                for a_value in a_var.initial_domain:
+                    supports[a_value] = sum(b_bits[b_value] for b_value in b_var.initial_domain
+                                            if constraint(a_value, b_value))
+                tables[key] = supports
+            edge_info[self.ARCH_SUPPORTS_KEY] = supports
+            edge_info[self.ARCH_RESIDUES_KEY] = {}
+
+    def edge_supports(self, a_var: Variable[D], b_var: Variable[D]) -> dict[D, int] | None:
+        return self._edge_info[(a_var, b_var)].get(self.ARCH_SUPPORTS_KEY)
+
+    def edge_residues(self, a_var: Variable[D], b_var: Variable[D]) -> dict[D, int] | None:
+        return self._edge_info[(a_var, b_var)].get(self.ARCH_RESIDUES_KEY)
+
+    def value_bits(self, var: Variable[D]) -> dict[D, int]:
+        value_bits = self._value_bits.get(var)
+        if value_bits is None:
+            if isinstance(var.domain, BitsetDomain):
+                value_bits = var.domain.bits
+            else:
+                value_bits = {value: 1 << index for index, value in enumerate(var.initial_domain)}
+            self._value_bits[var] = value_bits
+        return value_bits
+
+    def domain_mask(self, var: Variable[D]) -> int:
+        domain = var.domain
+        if isinstance(domain, BitsetDomain):
+            return domain.mask
+        value_bits = self.value_bits(var)
+        mask = 0
+        for value in domain:
+            mask |= value_bits[value]
+        return mask
+
+    def prune(self, var: Variable[D], value: D, cause: Variable[D] | None = None) -> None:
+        domain = var.domain
+        if isinstance(domain, BitsetDomain):
+            domain.remove(value)
+            self._trail.append((var, domain, -1, value, cause))
+        else:
+            index = domain.index(value)
+            del domain[index]
+            self._trail.append((var, domain, index, value, cause))
+        if len(domain) == 0:
+            self._wipeout = (var, cause)
+        for listener in self._domain_listeners:
+            listener(var)
+
+    def last_wipeout(self) -> tuple[Variable[D], Variable[D] | None] | None:
+        return self._wipeout
+
+    def prune_causes(self, since: int = 0) -> dict[Variable[D], set[Variable[D] | None]]:
+        causes = {}
+        for var, _, _, _, cause in self._trail[since:]:
+            causes.setdefault(var, set()).add(cause)
+        return causes
+
+    def subscribe_domain_changes(self, listener: Callable[[Variable[D]], None]) -> None:
+        self._domain_listeners.append(listener)
+
+    def unsubscribe_domain_changes(self, listener: Callable[[Variable[D]], None]) -> None:
+        self._domain_listeners.remove(listener)
+
+    def trail_mark(self) -> int:
+        return len(self._trail)
+
+    def undo(self, mark: int) -> None:
+        trail = self._trail
+        while len(trail) > mark:
+            var, domain, index, value, _ = trail.pop()
+            if index < 0:
+                domain.add(value)
+            else:
+                domain.insert(index, value)
+            for listener in self._domain_listeners:
+                listener(var)
+
+
+if __name__ == '__main__':
+    import random
+    import time
+    from csp.ac_3 import ac_3
+    from csp.csp_problems import knights_chessboard_problem
+
+    def edge_scan_is_consistent_value(csp: CSP, assignment: Assignment, var: Variable[any], value: any) -> bool:
+        all_edges = csp.edges()
+        for assigned_var in assignment._assignment.keys():
+            if (var, assigned_var) not in all_edges:
+                continue
+            _, assigned_var_value = assignment._assignment[assigned_var]
+            if not csp.edge_constraint(var, assigned_var)(value, assigned_var_value) \
+                    or not csp.edge_constraint(assigned_var, var)(assigned_var_value, value):
+                return False
+        return True
 
-    def restore_var_domains(self, backup_var_domains: dict[Variable[any], list[any]]) -> None:
-        for variable in self._adj.keys():
-            variable.domain = backup_var_domains[variable]
+    shared_domain = [1, 2, 3]
+    a_var, b_var, c_var = (Variable[int](domain=shared_domain, name=name) for name in ('A', 'B', 'C'))
+    shared_problem = CSP[Variable[int]]()
+    for var in (a_var, b_var, c_var):
+        shared_problem.add_node(var)
+    shared_problem.add_bidirectional_edge(a_var, b_var, constraint=lambda a, b: a < b)
+    if not ac_3(shared_problem) or a_var.domain != [1, 2] or b_var.domain != [2, 3] \
+            or c_var.domain != [1, 2, 3] or shared_domain != [1, 2, 3]:
+        raise AssertionError('variables built from a shared domain list corrupt each other!')
+
+    rng = random.Random(0)
+    for tot_knights in (8, 16, 32, 64):
+        csp_problem = knights_chessboard_problem(tot_knights=tot_knights, dim_chessboard=16)
+        variables = csp_problem.nodes()
+        assignment = Assignment(csp_problem, {})
+        for var in variables[:tot_knights // 2]:
+            assignment.set(var, rng.choice(var.initial_domain))
+        checks = [(var, rng.choice(var.initial_domain)) for var in variables[tot_knights // 2:] for _ in range(20)]
+
+        start = time.perf_counter()
+        expected = [edge_scan_is_consistent_value(csp_problem, assignment, var, value) for var, value in checks]
+        edge_scan_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = [assignment.is_consistent_value(var, value) for var, value in checks]
+        indexed_time = time.perf_counter() - start
+
+        if results != expected:
+            raise AssertionError('indexed and edge-scan consistency checks disagree!')
+        print(f'{tot_knights} knights, {len(csp_problem.edges())} edges: '
+              f'edge scan {edge_scan_time / len(checks) * 1e6:.1f} us/check, '
+              f'indexed {indexed_time / len(checks) * 1e6:.1f} us/check')
@@ -1,5 +1,5 @@
 import copy
-from .csp_components import CSP, Variable
+from .csp_components import CSP, AllDifferent, Variable
 
 
 def map_colouring_problem() -> CSP[Variable[str]]:
@@ -38,16 +38,22 @@ def map_colouring_problem() -> CSP[Variable[str]]:
     return csp
 
 
-def knights_chessboard_problem(tot_knights: int, dim_chessboard: int) -> CSP[Variable[tuple[int, int]]]:
+def knights_chessboard_problem(tot_knights: int,
+                               dim_chessboard: int,
+                               bitset_domains: bool = False,
+                               all_different: bool = False) -> CSP[Variable[tuple[int, int]]]:
     positions = [(i, j) for i in range(0, dim_chessboard) for j in range(0, dim_chessboard)]
     csp = CSP[Variable[tuple[int, int]]]()
     for k in range(0, tot_knights):
-        knight = Variable[tuple[int, int]](domain=copy.copy(positions), name=f'Knight{k}')
+        knight = Variable[tuple[int, int]](domain=copy.copy(positions), name=f'Knight{k}', bitset=bitset_domains)
         csp.add_node(knight)
 
+    if all_different:
+        csp.add_global_constraint(AllDifferent(csp.nodes()))
+
     def constraint(knight1_pos: tuple[int, int], knight2_pos: tuple[int, int]) -> bool:
         if knight1_pos == knight2_pos:
-            return False
+            return all_different
 
         knight1_moves = [
             (knight1_pos[0] + 1, knight1_pos[1] + 3),
@@ -1,59 +1,142 @@
+import time
+from random import Random
 from typing import Callable
-from copy import deepcopy
-from random import shuffle
 
 from csp.csp_components import CSP, Assignment, Variable
 from csp.csp_problems import knights_chessboard_problem
 
 
-def min_conflicts(csp: CSP[Variable[any]],
-                  max_steps: int,
-                  init_assignment: Callable[[CSP[Variable[any]]], Assignment[Variable[any]]] =
-                  lambda csp: _init_random_assignment(csp)
-                  ) -> Assignment[Variable[any]] | bool:
+class ConflictCounts:
 
-    assignment = init_assignment(csp)
-    for _ in range(0, max_steps):
-        if assignment.is_solution():
-            return assignment
+    def __init__(self, csp: CSP[Variable[any]], assignment: Assignment[Variable[any]], rng: Random | None = None):
+        self._rng = rng or Random()
+        self._values: dict[Variable[any], any] = {var: assignment.value(var) for var in csp.nodes()}
+        positions = {var: position for position, var in enumerate(self._values)}
+        self._arcs: dict[Variable[any], list[tuple[Variable[any], Callable, Callable]]] = {
+            var: [(adj, csp.edge_constraint(var, adj), csp.edge_constraint(adj, var))
+                  for adj in sorted(csp.neighbors(var), key=positions.__getitem__)]
+            for var in self._values
+        }
+        for constraint in csp.global_constraints():
+            for a_var, b_var, constraint_a_b in constraint.decompose():
+                self._arcs[a_var].append((b_var, constraint_a_b, None))
+                self._arcs[b_var].append((a_var, None, constraint_a_b))
+        self._counts: dict[Variable[any], dict[any, int]] = {}
+        self._conflicted: list[Variable[any]] = []
+        self._positions: dict[Variable[any], int] = {}
 
-        conflicted_var = _choose_random_conflicted_var(assignment)
-        min_conflict_value = _min_conflicts_value(csp, conflicted_var)
-        assignment.set(conflicted_var, min_conflict_value)
-    return False
+        for var, arcs in self._arcs.items():
+            counts = {value: 0 for value in var.initial_domain}
+            for adj, constraint_var_adj, constraint_adj_var in arcs:
+                adj_value = self._values[adj]
+                for value in counts:
+                    if self._is_conflict(constraint_var_adj, constraint_adj_var, value, adj_value):
+                        counts[value] += 1
+            self._counts[var] = counts
+            self._refresh(var)
 
+    def is_solution(self) -> bool:
+        return not self._conflicted
+
+    def value(self, var: Variable[any]) -> any:
+        return self._values[var]
+
+    def num_conflicts(self, var: Variable[any], value: any = None) -> int:
+        return self._counts[var][self._values[var] if value is None else value]
+
+    def conflicted_variables(self) -> list[Variable[any]]:
+        return list(self._conflicted)
+
+    def random_conflicted_var(self) -> Variable[any]:
+        return self._rng.choice(self._conflicted)
+
+    def min_conflicts_value(self, var: Variable[any]) -> any:
+        counts = self._counts[var]
+        min_conflicts = min(counts.values())
+        return self._rng.choice([value for value, num_conflicts in counts.items() if num_conflicts == min_conflicts])
+
+    def set(self, var: Variable[any], value: any) -> None:
+        old_value = self._values[var]
+        if value == old_value:
+            return
+        self._values[var] = value
+
+        is_conflict = self._is_conflict
+        for adj, constraint_var_adj, constraint_adj_var in self._arcs[var]:
+            adj_counts = self._counts[adj]
+            for adj_value in adj_counts:
+                adj_counts[adj_value] += is_conflict(constraint_adj_var, constraint_var_adj, adj_value, value) \
+                    - is_conflict(constraint_adj_var, constraint_var_adj, adj_value, old_value)
+            self._refresh(adj)
+        self._refresh(var)
+
+    def _refresh(self, var: Variable[any]) -> None:
+        conflicted = self._counts[var][self._values[var]] > 0
+        position = self._positions.get(var)
+        if conflicted and position is None:
+            self._positions[var] = len(self._conflicted)
+            self._conflicted.append(var)
+        elif not conflicted and position is not None:
+            last_var = self._conflicted.pop()
+            if last_var is not var:
+                self._conflicted[position] = last_var
+                self._positions[last_var] = position
+            del self._positions[var]
+
+    @staticmethod
+    def _is_conflict(constraint_a_b: Callable | None,
+                     constraint_b_a: Callable | None,
+                     a_value: any,
+                     b_value: any) -> bool:
+        return (constraint_a_b is not None and not constraint_a_b(a_value, b_value)) \
+            or (constraint_b_a is not None and not constraint_b_a(b_value, a_value))
+
+
+def min_conflicts(csp: CSP[Variable[any]],
+                  max_steps: int,
+                  init_assignment: Callable[[CSP[Variable[any]]], Assignment[Variable[any]]] | None = None,
+                  seed: int | None = None) -> Assignment[Variable[any]] | bool:
+    rng = Random(seed)
+    assignment = init_assignment(csp) if init_assignment is not None else _init_random_assignment(csp, rng)
+    conflict_counts, _ = _walk(csp, assignment, max_steps, rng)
+    if conflict_counts is None:
+        return False
 
-def _init_random_assignment(csp: CSP[Variable[any]]) -> Assignment[Variable[any]]:
-    assignment = Assignment(csp, {})
     for var in csp.nodes():
-        var_domain = deepcopy(var.domain)
-        shuffle(var_domain)
-        assignment.set(var, var_domain[0])
+        if assignment.value(var) != conflict_counts.value(var):
+            assignment.set(var, conflict_counts.value(var))
     return assignment
 
 
-def _choose_random_conflicted_var(assignment: Assignment[Variable[any]]) -> Variable[any]:
-    conflicted_vars = deepcopy(assignment.conflicted_variables())
-    shuffle(conflicted_vars)
-    return conflicted_vars[0]
+def _walk(csp: CSP[Variable[any]],
+          assignment: Assignment[Variable[any]],
+          max_steps: int,
+          rng: Random) -> tuple[ConflictCounts | None, int]:
+    conflict_counts = ConflictCounts(csp, assignment, rng)
+    for step in range(0, max_steps):
+        if conflict_counts.is_solution():
+            return conflict_counts, step
 
+        conflicted_var = conflict_counts.random_conflicted_var()
+        conflict_counts.set(conflicted_var, conflict_counts.min_conflicts_value(conflicted_var))
+    return (conflict_counts, max_steps) if conflict_counts.is_solution() else (None, max_steps)
 
-def _min_conflicts_value(csp: CSP[Variable[any]], var: Variable[any]) -> any:
-    num_conflicts_by_var_value = {}
-    for var_value in var.initial_domain:
-        for adj in csp.adj(var):
-            constraint_var_adj = csp.edge_constraint(var, adj)
-            adj_value = adj.domain[0]
-            if not constraint_var_adj(var_value, adj_value):
-                num_conflicts_by_var_value[var_value] = num_conflicts_by_var_value.get(var_value, 0) + 1
 
-    items = list(num_conflicts_by_var_value.items())
-    shuffle(items)
-    num_conflicts_by_var_value = dict(items)
-    return min(num_conflicts_by_var_value, key=num_conflicts_by_var_value.get)
+def _init_random_assignment(csp: CSP[Variable[any]], rng: Random | None = None) -> Assignment[Variable[any]]:
+    rng = rng or Random()
+    assignment = Assignment(csp, {})
+    for var in csp.nodes():
+        assignment.set(var, rng.choice(list(var.domain)))
+    return assignment
 
 
 if __name__ == '__main__':
     csp_problem = knights_chessboard_problem(tot_knights=5, dim_chessboard=8)
 
     print(min_conflicts(csp_problem, 1000))
+
+    csp_problem = knights_chessboard_problem(tot_knights=40, dim_chessboard=16)
+    start = time.perf_counter()
+    solution = min_conflicts(csp_problem, 100000)
+    print(f'40 knights on 16x16: solved={solution is not False and solution.is_solution()} '
+          f'in {time.perf_counter() - start:.2f}s')
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+from dataclasses import dataclass
+from multiprocessing import get_context
+from random import Random
+
+from csp.csp_components import CSP, Assignment, Variable
+from csp.csp_problems import knights_chessboard_problem
+from csp.min_conflicts import _init_random_assignment, _walk
+
+
+@dataclass(slots=True, frozen=True)
+class MinConflictsResult:
+    assignment: Assignment[Variable[any]]
+    seed: int
+    steps: int
+
+
+def parallel_min_conflicts(csp: CSP[Variable[any]],
+                           max_steps: int,
+                           restarts: int = 64,
+                           seed: int = 0,
+                           workers: int | None = None) -> MinConflictsResult | bool:
+    workers = workers or os.cpu_count()
+    context = get_context('fork')
+    with context.Pool(workers, initializer=_init_worker, initargs=(csp, max_steps)) as pool:
+        for restart_seed, steps, values in pool.imap_unordered(_restart, range(seed, seed + restarts)):
+            if values is not None:
+                assignment = Assignment(csp, dict(zip(csp.nodes(), values)))
+                return MinConflictsResult(assignment, restart_seed, steps)
+    return False
+
+
+_worker_csp: CSP[Variable[any]] | None = None
+_worker_max_steps = 0
+
+
+def _init_worker(csp: CSP[Variable[any]], max_steps: int) -> None:
+    global _worker_csp, _worker_max_steps
+    _worker_csp = csp
+    _worker_max_steps = max_steps
+
+
+def _restart(seed: int) -> tuple[int, int, list[any] | None]:
+    rng = Random(seed)
+    variables = _worker_csp.nodes()
+    assignment = _init_random_assignment(_worker_csp, rng)
+    conflict_counts, steps = _walk(_worker_csp, assignment, _worker_max_steps, rng)
+    values = None if conflict_counts is None else [conflict_counts.value(var) for var in variables]
+    for var in variables:
+        assignment.remove(var)
+    return seed, steps, values
+
+
+if __name__ == '__main__':
+    tot_knights = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    dim_chessboard = int(sys.argv[2]) if len(sys.argv) > 2 else 14
+
+    for workers in (1, os.cpu_count()):
+        csp_problem = knights_chessboard_problem(tot_knights=tot_knights, dim_chessboard=dim_chessboard)
+        start = time.perf_counter()
+        result = parallel_min_conflicts(csp_problem, max_steps=2000, restarts=256, workers=workers)
+        elapsed = time.perf_counter() - start
+        if result is False:
+            print(f'workers={workers}: no solution in {elapsed:.2f}s')
+        else:
+            print(f'workers={workers}: seed={result.seed} steps={result.steps} '
+                  f'solved={result.assignment.is_solution()} in {elapsed:.2f}s')
@@ -1,4 +1,11 @@
-from typing import TypeVar, Generic, Callable
+from __future__ import annotations
+
+import csv
+import struct
+from array import array
+from bisect import bisect_left
+from mmap import mmap as memory_map, ACCESS_READ, ACCESS_WRITE
+from typing import TypeVar, Generic, Callable, Sequence
 
 
 T = TypeVar("T")
@@ -10,11 +17,14 @@ class Graph(Generic[T]):
     def __init__(self):
         self._adj: dict[T, list[T]] = {}
         self._edge_info: dict[tuple[T, T], dict[str, any]] = {}
+        self._listeners: list[Callable[[T, T, int], None]] = []
+        self._version = 0
 
     def add_node(self, node: T) -> None:
         if node in self._adj:
             raise ValueError("This node is already present!")
         self._adj[node] = []
+        self._version += 1
 
     def add_edge(self,
                  a_node: T,
@@ -26,6 +36,20 @@ class Graph(Generic[T]):
         self._edge_info.setdefault((a_node, b_node), {})
         edge_info = self._edge_info[(a_node, b_node)]
         edge_info[self.ARCH_COST_KEY] = cost
+        self._version += 1
+        self._notify(a_node, b_node, cost)
+
+    def update_edge_cost(self, a_node: T, b_node: T, cost: int) -> None:
+        edge_info = self._edge_info[(a_node, b_node)]
+        edge_info[self.ARCH_COST_KEY] = cost
+        self._version += 1
+        self._notify(a_node, b_node, cost)
+
+    def subscribe(self, listener: Callable[[T, T, int], None]) -> None:
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[T, T, int], None]) -> None:
+        self._listeners.remove(listener)
 
     def add_bidirectional_edge(self,
                                a_node: T,
@@ -46,5 +70,276 @@ class Graph(Generic[T]):
     def edges(self) -> list[tuple[T, T]]:
         return list(self._edge_info.keys())
 
+    def version(self) -> int:
+        return self._version
+
+    def _notify(self, a_node: T, b_node: T, cost: int) -> None:
+        for listener in self._listeners:
+            listener(a_node, b_node, cost)
+
+    def freeze(self) -> CompactGraph[T]:
+        return CompactGraph.from_graph(self)
+
+    def save(self, path: str) -> None:
+        self.freeze().save(path)
+
+    @staticmethod
+    def load(path: str, mmap: bool = True) -> CompactGraph[str]:
+        return CompactGraph.load(path, mmap=mmap)
+
     def __len__(self) -> int:
         return len(self._adj)
+
+
+class CompactGraph(Generic[T]):
+    FILE_MAGIC = b'CSRGRAPH'
+    _FILE_HEADER = struct.Struct('<8sQQQc7x')
+
+    def __init__(self,
+                 nodes: list[T],
+                 offsets: Sequence[int],
+                 targets: Sequence[int],
+                 costs: Sequence[int | float],
+                 path: str | None = None):
+        if len(offsets) != len(nodes) + 1:
+            raise ValueError("offsets must have one entry per node plus one!")
+        if len(targets) != len(costs):
+            raise ValueError("targets and costs must have the same length!")
+        self._nodes = nodes
+        self._ids: dict[T, int] = {node: node_id for node_id, node in enumerate(nodes)}
+        self._offsets = offsets
+        self._targets = targets
+        self._costs = costs
+        self._path = path
+
+    @classmethod
+    def from_graph(cls, graph: Graph[T]) -> CompactGraph[T]:
+        nodes = graph.nodes()
+        ids = {node: node_id for node_id, node in enumerate(nodes)}
+        integer_costs = all(isinstance(graph.edge_cost(a_node, b_node), int) for a_node, b_node in graph.edges())
+        cost_typecode = 'q' if integer_costs else 'd'
+
+        offsets = array('q', [0])
+        targets = array('q')
+        costs = array(cost_typecode)
+        for node in nodes:
+            row = sorted({ids[adj]: adj for adj in graph.adj(node)}.items())
+            for adj_id, adj in row:
+                targets.append(adj_id)
+                costs.append(graph.edge_cost(node, adj))
+            offsets.append(len(targets))
+        return cls(nodes, offsets, targets, costs)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> CompactGraph[str]:
+        with open(path, 'rb') as file:
+            if mmap:
+                data = memoryview(memory_map(file.fileno(), 0, access=ACCESS_READ))
+            else:
+                data = memoryview(file.read())
+
+        magic, num_nodes, num_edges, labels_nbytes, cost_typecode = cls._FILE_HEADER.unpack_from(data)
+        if magic != cls.FILE_MAGIC:
+            raise ValueError(f"{path} is not a graph file!")
+        sections = _file_sections(num_nodes, num_edges, labels_nbytes)
+        offsets, targets, costs, label_offsets = (
+            data[start:end].cast(typecode)
+            for (start, end), typecode in zip(sections, ('q', 'q', cost_typecode.decode(), 'q'))
+        )
+        labels = data[sections[4][0]:sections[4][1]]
+        nodes = [str(labels[label_offsets[i]:label_offsets[i + 1]], 'utf-8') for i in range(num_nodes)]
+        if not mmap:
+            offsets, targets, costs = (array(buffer.format, buffer) for buffer in (offsets, targets, costs))
+        return cls(nodes, offsets, targets, costs, path=path if mmap else None)
+
+    @classmethod
+    def import_edge_list(cls,
+                         source_path: str,
+                         path: str,
+                         delimiter: str = ',',
+                         skip_header: bool = False,
+                         bidirectional: bool = False) -> None:
+        def read_edges():
+            with open(source_path, newline='') as source:
+                rows = csv.reader(source, delimiter=delimiter)
+                if skip_header:
+                    next(rows, None)
+                for row in rows:
+                    if not row:
+                        continue
+                    cost = _parse_cost(row[2]) if len(row) > 2 else 0
+                    yield row[0], row[1], cost
+                    if bidirectional:
+                        yield row[1], row[0], cost
+
+        ids: dict[str, int] = {}
+        out_degrees = array('q')
+        num_edges = 0
+        integer_costs = True
+        for a_node, b_node, cost in read_edges():
+            for node in (a_node, b_node):
+                if node not in ids:
+                    ids[node] = len(ids)
+                    out_degrees.append(0)
+            out_degrees[ids[a_node]] += 1
+            num_edges += 1
+            integer_costs = integer_costs and isinstance(cost, int)
+
+        offsets = array('q', [0])
+        for out_degree in out_degrees:
+            offsets.append(offsets[-1] + out_degree)
+        del out_degrees
+        encoded_labels = [node.encode('utf-8') for node in ids]
+        label_offsets = array('q', [0])
+        for label in encoded_labels:
+            label_offsets.append(label_offsets[-1] + len(label))
+        cost_typecode = 'q' if integer_costs else 'd'
+
+        num_nodes = len(ids)
+        sections = _file_sections(num_nodes, num_edges, label_offsets[-1])
+        with open(path, 'w+b') as file:
+            file.write(cls._FILE_HEADER.pack(cls.FILE_MAGIC, num_nodes, num_edges, label_offsets[-1],
+                                             cost_typecode.encode()))
+            offsets.tofile(file)
+            file.seek(sections[3][0])
+            label_offsets.tofile(file)
+            for label in encoded_labels:
+                file.write(label)
+            file.flush()
+            del encoded_labels, label_offsets
+
+            with memory_map(file.fileno(), 0, access=ACCESS_WRITE) as data:
+                with memoryview(data) as view:
+                    targets = view[sections[1][0]:sections[1][1]].cast('q')
+                    costs = view[sections[2][0]:sections[2][1]].cast(cost_typecode)
+                    cursors = array('q', offsets[:-1])
+                    for a_node, b_node, cost in read_edges():
+                        a_id = ids[a_node]
+                        targets[cursors[a_id]] = ids[b_node]
+                        costs[cursors[a_id]] = cost
+                        cursors[a_id] += 1
+                    del cursors
+                    merged_offsets = array('q', [0])
+                    for node_id in range(num_nodes):
+                        lo, hi = offsets[node_id], offsets[node_id + 1]
+                        row = sorted(dict(zip(targets[lo:hi], costs[lo:hi])).items())
+                        for i, (adj_id, cost) in enumerate(row, start=merged_offsets[-1]):
+                            targets[i] = adj_id
+                            costs[i] = cost
+                        merged_offsets.append(merged_offsets[-1] + len(row))
+                    targets.release()
+                    costs.release()
+
+                    if merged_offsets[-1] != num_edges:
+                        num_edges = merged_offsets[-1]
+                        merged_sections = _file_sections(num_nodes, num_edges, sections[4][1] - sections[4][0])
+                        _move_bytes(view, sections[2][0], merged_sections[2][0], num_edges * 8)
+                        _move_bytes(view, sections[3][0], merged_sections[3][0], sections[4][1] - sections[3][0])
+                        view[:cls._FILE_HEADER.size] = cls._FILE_HEADER.pack(cls.FILE_MAGIC, num_nodes, num_edges,
+                                                                            sections[4][1] - sections[4][0],
+                                                                            cost_typecode.encode())
+                        view[sections[0][0]:sections[0][1]] = merged_offsets.tobytes()
+                        sections = merged_sections
+                data.flush()
+            file.truncate(sections[4][1])
+
+    def save(self, path: str) -> None:
+        labels = []
+        for node in self._nodes:
+            if not isinstance(node, str):
+                raise TypeError("Only graphs with str nodes can be saved!")
+            labels.append(node.encode('utf-8'))
+        label_offsets = array('q', [0])
+        for label in labels:
+            label_offsets.append(label_offsets[-1] + len(label))
+
+        cost_typecode = 'q' if all(isinstance(cost, int) for cost in self._costs) else 'd'
+        with open(path, 'wb') as file:
+            file.write(self._FILE_HEADER.pack(self.FILE_MAGIC, len(self._nodes), len(self._targets),
+                                              label_offsets[-1], cost_typecode.encode()))
+            array('q', self._offsets).tofile(file)
+            array('q', self._targets).tofile(file)
+            array(cost_typecode, self._costs).tofile(file)
+            label_offsets.tofile(file)
+            for label in labels:
+                file.write(label)
+
+    def node_id(self, node: T) -> int:
+        return self._ids[node]
+
+    def node_at(self, node_id: int) -> T:
+        return self._nodes[node_id]
+
+    def adj_ids(self, node_id: int) -> Sequence[int]:
+        return self._targets[self._offsets[node_id]:self._offsets[node_id + 1]]
+
+    def edge_cost_by_id(self, a_id: int, b_id: int) -> int | float:
+        return self._costs[self._edge_index(a_id, b_id)]
+
+    def adj(self, node: T) -> list[T]:
+        nodes = self._nodes
+        return [nodes[adj_id] for adj_id in self.adj_ids(self._ids[node])]
+
+    def edge_cost(self, a_node: T, b_node: T) -> int | float:
+        return self._costs[self._edge_index(self._ids[a_node], self._ids[b_node])]
+
+    def nodes(self) -> list[T]:
+        return list(self._nodes)
+
+    def edges(self) -> list[tuple[T, T]]:
+        nodes, offsets, targets = self._nodes, self._offsets, self._targets
+        return [(nodes[a_id], nodes[targets[i]])
+                for a_id in range(len(nodes))
+                for i in range(offsets[a_id], offsets[a_id + 1])]
+
+    def buffers(self) -> tuple[Sequence[int], Sequence[int], Sequence[int | float]]:
+        return self._offsets, self._targets, self._costs
+
+    def path(self) -> str | None:
+        return self._path
+
+    def version(self) -> int:
+        return 0
+
+    def num_edges(self) -> int:
+        return len(self._targets)
+
+    def nbytes(self) -> int:
+        return sum(len(buffer) * buffer.itemsize for buffer in (self._offsets, self._targets, self._costs))
+
+    def bytes_per_edge(self) -> float:
+        if not self._targets:
+            return 0.0
+        return self.nbytes() / len(self._targets)
+
+    def _edge_index(self, a_id: int, b_id: int) -> int:
+        lo, hi = self._offsets[a_id], self._offsets[a_id + 1]
+        i = bisect_left(self._targets, b_id, lo, hi)
+        if i == hi or self._targets[i] != b_id:
+            raise KeyError((self._nodes[a_id], self._nodes[b_id]))
+        return i
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+
+def _file_sections(num_nodes: int, num_edges: int, labels_nbytes: int) -> list[tuple[int, int]]:
+    sections = []
+    start = CompactGraph._FILE_HEADER.size
+    for nbytes in ((num_nodes + 1) * 8, num_edges * 8, num_edges * 8, (num_nodes + 1) * 8, labels_nbytes):
+        sections.append((start, start + nbytes))
+        start += nbytes
+    return sections
+
+
+def _move_bytes(view: memoryview, source: int, destination: int, nbytes: int, chunk: int = 1 << 20) -> None:
+    for start in range(0, nbytes, chunk):
+        end = min(start + chunk, nbytes)
+        view[destination + start:destination + end] = bytes(view[source + start:source + end])
+
+
+def _parse_cost(cost: str) -> int | float:
+    try:
+        return int(cost)
+    except ValueError:
+        return float(cost)